@@ -1,12 +1,35 @@
 from quart_cors import cors
 from functools import wraps
 from pydantic import BaseModel, Field
-import os, json, logging, aiohttp
-from quart import Quart, request, jsonify
+import os, json, time, asyncio, hashlib, logging, aiohttp
+from quart import Quart, request, jsonify, make_response
 from openai import OpenAIError, RateLimitError, AsyncOpenAI
-from modal import Image, App, Secret, asgi_app
-from repository.context import MessageContextBonzo
-from prompts import prompts
+from jiter import from_json
+from modal import Image, App, Secret, asgi_app, enter
+from repository import TABLE_NAMES, ensure_dynamo_table
+from repository.context import CONTEXT_EXPORT_FIELDS, RESERVED_PREFIXES, MessageContextBonzo, context_item, is_reserved_id
+from repository.jobs import get_job_store
+from repository.prompts import PromptStore
+from repository.usage import UsageStore
+from repository.history import HistoryLogStore
+from services.worker import WorkerPool
+from services.singleflight import SingleFlight, request_fingerprint
+from services.metrics import metrics, span, timed
+from services.json_provider import encode, get_json_provider
+from services.compression import ResponseCompressor
+from services.usage import DIMENSIONS as USAGE_DIMENSIONS, UsageLedger
+from services.ratelimit import RateLimiter, estimate_tokens
+from services.tokens import count_tokens
+from services.packing import CONTEXT_TOKEN_BUDGET, keyword_scores, pack_context
+from services.embeddings import decode_index, encode_index, get_embedder, top_k
+from services.response_cache import RESPONSE_CACHE_ENABLED, ResponseCache
+from services.prompt_builder import PromptBuilder, PromptCacheStats
+from services.prompt_registry import PromptRegistry
+from services.prospect_cache import ProspectCache, get_prospect_cache_backend
+from services.history import PROSPECT_HISTORY_SYNC, HistorySync
+from services.summary import ConversationSummarizer, history_fingerprint, message_text
+from services.bonzo import BonzoAPIError, PoolStats, bonzo_headers, create_session, fetch_prospect_context, send_sms
+from prompts import prompts, REPLY_GUIDELINES_PROMPT, DEFAULT_TONE_INSTRUCTIONS
 
 quart_app = Quart(__name__)
 quart_app = cors(
@@ -15,15 +38,30 @@ quart_app = cors(
     allow_headers="*",
     allow_methods=["POST", "DELETE"]
 )
+quart_app.json = get_json_provider(quart_app)
+response_compressor = ResponseCompressor()
 
 # Create a Modal App and Network File System
 modal_app = App("rad-integration")
-aclient = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Retries are handled by the shared rate limiter rather than the SDK
+aclient = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+rate_limiter = RateLimiter()
+embedder = get_embedder(aclient, rate_limiter)
+response_cache = ResponseCache(embedder)
+prompt_cache_stats = PromptCacheStats()
+
+def record_usage(model, usage):
+    prompt_cache_stats.record(model, usage)
+    metrics.record_tokens(model, usage)
+    usage_ledger.record(model, usage)
 
 image = (
     Image.debian_slim()
     .pip_install_from_requirements("requirements.txt")
+    .env({"TIKTOKEN_CACHE_DIR": "/root/.tiktoken"})
+    .run_commands("python -c \"import tiktoken; tiktoken.get_encoding('o200k_base')\"")
     .add_local_dir("repository", "/root/repository")
+    .add_local_dir("services", "/root/services")
     .add_local_file("prompts.py", "/root/prompts.py")
 )
 
@@ -32,6 +70,130 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 context_store = MessageContextBonzo()
+job_store = get_job_store()
+prompt_store = PromptStore()
+prompt_registry = PromptRegistry(prompts, prompt_store)
+worker_pool = WorkerPool()
+single_flight = SingleFlight()
+usage_store = UsageStore()
+usage_ledger = UsageLedger(usage_store)
+
+# Candidate chunks retrieved per turn before packing to the token budget
+CONTEXT_TOP_K = int(os.environ.get("CONTEXT_TOP_K", "8"))
+
+# Only answers that keep the conversation going are reused from the response cache
+CACHEABLE_STATUSES = ("continue_conversation", "out_of_scope")
+
+# Model used to fold old turns into the rolling conversation summary
+SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", "gpt-4.1-mini")
+
+# Bounded fan-out for /send_ai_message/batch
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "10"))
+BATCH_MAX_PROSPECTS = int(os.environ.get("BATCH_MAX_PROSPECTS", "5000"))
+
+# Bulk context sync from the CRM; write-behind acknowledges before DynamoDB is written
+CONTEXT_BATCH_MAX = int(os.environ.get("CONTEXT_BATCH_MAX", "5000"))
+CONTEXT_WRITE_BEHIND = os.environ.get("CONTEXT_WRITE_BEHIND", "false").lower() == "true"
+
+bonzo_pool_stats = PoolStats()
+
+# Prospect records and notes change far less often than we message prospects
+prospect_cache_backend = get_prospect_cache_backend()
+prospect_cache = ProspectCache(prospect_cache_backend) if prospect_cache_backend is not None else None
+
+# Opt-in per-prospect communication log (PROSPECT_HISTORY_SYNC); Bonzo is only
+# asked for messages newer than it
+history_store = HistoryLogStore() if PROSPECT_HISTORY_SYNC else None
+prospect_history = HistorySync(history_store) if history_store is not None else None
+
+# One pooled keep-alive session to the Bonzo API per app
+@quart_app.before_serving
+async def open_bonzo_session():
+    quart_app.bonzo_session = create_session(bonzo_pool_stats)
+
+# Async send_ai_message jobs; drained before the Bonzo session closes
+@quart_app.before_serving
+async def start_job_workers():
+    worker_pool.start()
+
+@quart_app.after_serving
+async def stop_job_workers():
+    await worker_pool.stop()
+
+@quart_app.after_serving
+async def close_bonzo_session():
+    await quart_app.bonzo_session.close()
+
+# Startup I/O runs in the background so the first request isn't held behind it;
+# stores and the registry still initialise lazily if a request gets there first
+async def connect_stores():
+    await asyncio.gather(context_store.connect(), prompt_store.connect(), usage_store.connect())
+    if hasattr(job_store, "connect"):
+        await job_store.connect()
+    await prompt_registry.refresh()
+
+@quart_app.before_serving
+async def warm_stores():
+    quart_app.add_background_task(connect_stores)
+
+# Stored prompts are reloaded in the background every PROMPT_REFRESH_SECONDS
+@quart_app.before_serving
+async def start_prompt_refresh():
+    prompt_registry.start()
+
+@quart_app.after_serving
+async def stop_prompt_refresh():
+    await prompt_registry.stop()
+
+# Usage rows are buffered in memory and written in batches
+@quart_app.before_serving
+async def start_usage_ledger():
+    usage_ledger.start()
+
+@quart_app.after_serving
+async def flush_usage_ledger():
+    await usage_ledger.stop()
+
+@quart_app.before_serving
+async def start_context_write_behind():
+    context_store.write_behind.start()
+
+@quart_app.after_serving
+async def flush_context_write_behind():
+    await context_store.write_behind.stop()
+
+@quart_app.after_serving
+async def shutdown_context_store():
+    context_store.close()
+    prompt_store.close()
+    usage_store.close()
+    if hasattr(prospect_cache_backend, "close"):
+        prospect_cache_backend.close()
+    if hasattr(job_store, "close"):
+        job_store.close()
+    if history_store is not None:
+        history_store.close()
+
+# Per-request span timings; send X-Debug-Timing to get them back as Server-Timing
+@quart_app.before_request
+async def start_request_timing():
+    metrics.begin_request(request.endpoint)
+    usage_ledger.begin(request.endpoint)
+
+@quart_app.after_request
+async def finish_request_timing(response):
+    timings = metrics.end_request(response.status_code)
+    if timings is not None:
+        usage_ledger.record_request(timings.elapsed)
+        if request.headers.get("X-Debug-Timing"):
+            response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+# gzip/brotli for large JSON bodies; registered after the timing hook so it runs
+# first and its span is part of the request
+@quart_app.after_request
+async def compress_response(response):
+    return await response_compressor.compress(request, response)
 
 def get_api_key():
     return os.environ.get("API_KEY")
@@ -56,23 +218,33 @@ async def upload_context():
         goal = data.get("goal", None)
         tone = data.get("tone", None)
         schema_context = data.get("schema_context", [])
+        token_budget = data.get("token_budget", None)
 
-        if not id or not context or not isinstance(context, list):
-            return jsonify({"error": "Missing required fields: id and context are required."}), 400
+        error = validate_context_upload(data)
+        if error:
+            return jsonify({"error": error}), 400
 
-        if schema_context and not isinstance(schema_context, list):
-            return jsonify({"error": "Invalid schema_context format. It must be a list of schemas."}), 400
+        [(context_tokens, context_index)] = await index_contexts([context])
 
-        await context_store.update_message_context(id, context, goal, tone, schema_context)
+        await context_store.update_message_context(id, context, goal, tone, schema_context, context_tokens, token_budget, context_index)
+        response_cache.invalidate_context(id)
+        content_hash = context_hash(context, goal, tone, schema_context, token_budget)
 
         logging.info(f"Context uploaded successfully for id {id}.")
+        # Large knowledge bases needn't be echoed back to callers that don't use them
+        if data.get("minimal", False) or "return=minimal" in request.headers.get("Prefer", ""):
+            return jsonify({"id": id, "content_hash": content_hash}), 200
+
         return jsonify({
             "message": "Context uploaded successfully.",
             "id": id,
             "context": context,
             "goal": goal,
             "tone": tone,
-            "schema_context": schema_context
+            "schema_context": schema_context,
+            "context_tokens": sum(context_tokens),
+            "token_budget": token_budget,
+            "content_hash": content_hash
         }), 200
 
     except Exception as e:
@@ -80,6 +252,94 @@ async def upload_context():
         return jsonify({"error": f"Error uploading context: {str(e)}"}), 500
 
 
+RESERVED_ID_ERROR = f"Invalid id. Context ids may not start with {' or '.join(RESERVED_PREFIXES)}"
+
+def validate_context_upload(data):
+    # Returns an error message, or None when the upload is valid
+    context = data.get("context")
+    schema_context = data.get("schema_context", [])
+    token_budget = data.get("token_budget", None)
+
+    if not data.get("id") or not context or not isinstance(context, list):
+        return "Missing required fields: id and context are required."
+
+    if is_reserved_id(data.get("id")):
+        return RESERVED_ID_ERROR
+
+    if schema_context and not isinstance(schema_context, list):
+        return "Invalid schema_context format. It must be a list of schemas."
+
+    if token_budget is not None and (not isinstance(token_budget, int) or isinstance(token_budget, bool) or token_budget <= 0):
+        return "Invalid token_budget. It must be a positive integer."
+
+    return None
+
+def context_hash(context, goal, tone, schema_context, token_budget):
+    # Lets callers check what was stored without having it echoed back
+    return hashlib.sha256(encode([context, goal, tone, schema_context, token_budget], sort_keys=True)).hexdigest()
+
+async def index_contexts(contexts):
+    # Measure and embed every chunk once here so each turn only has to
+    # retrieve and pack them. All uploads share one embedding call.
+    vectors = await embedder.embed([str(chunk) for context in contexts for chunk in context])
+    indexed = []
+    offset = 0
+    for context in contexts:
+        block = vectors[offset:offset + len(context)]
+        offset += len(context)
+        context_tokens = [count_tokens(str(chunk)) for chunk in context]
+        indexed.append((context_tokens, {"vectors": encode_index(block), "embedder": embedder.name, "dim": vectors.shape[1]}))
+    return indexed
+
+@quart_app.route("/upload_context/batch", methods=["POST"])
+@require_api_key
+async def upload_context_batch():
+    try:
+        data = await request.json
+        uploads = data.get("contexts")
+        write_behind = data.get("write_behind", CONTEXT_WRITE_BEHIND)
+
+        if not uploads or not isinstance(uploads, list):
+            return jsonify({"error": "Missing required field: contexts (list)"}), 400
+
+        if len(uploads) > CONTEXT_BATCH_MAX:
+            return jsonify({"error": f"A batch may contain at most {CONTEXT_BATCH_MAX} contexts"}), 400
+
+        # Invalid uploads are reported individually; the last upload per id wins
+        errors = []
+        valid = {}
+        for index, upload in enumerate(uploads):
+            error = validate_context_upload(upload) if isinstance(upload, dict) else "Each upload must be an object."
+            if error:
+                errors.append({"index": index, "id": upload.get("id") if isinstance(upload, dict) else None, "error": error})
+            else:
+                valid[upload["id"]] = upload
+
+        if not valid:
+            return jsonify({"error": "No valid contexts in batch", "errors": errors}), 400
+
+        indexed = await index_contexts([upload["context"] for upload in valid.values()])
+        items = [
+            context_item(id, upload["context"], upload.get("goal"), upload.get("tone"), upload.get("schema_context", []), context_tokens, upload.get("token_budget"), context_index)
+            for (id, upload), (context_tokens, context_index) in zip(valid.items(), indexed)
+        ]
+        await context_store.batch_update_message_contexts(items, write_behind=write_behind)
+        for id in valid:
+            response_cache.invalidate_context(id)
+
+        logging.info(f"Batch uploaded {len(items)} contexts ({len(errors)} rejected).")
+        return jsonify({
+            "message": "Contexts accepted." if write_behind else "Contexts uploaded successfully.",
+            "uploaded": len(items),
+            "ids": list(valid),
+            "write_behind": bool(write_behind),
+            "errors": errors
+        }), 202 if write_behind else 200
+
+    except Exception as e:
+        logging.error(f"Error batch uploading contexts: {e}")
+        return jsonify({"error": f"Error batch uploading contexts: {str(e)}"}), 500
+
 class SchemaDiff(BaseModel):
     updated_schema: dict = Field(..., description="The updated version of the input schema")
     changes: dict = Field(..., description="The differences found from comparing user input")
@@ -94,6 +354,84 @@ class Sentiment(BaseModel):
     response: str
     conversation_status: str
 
+@quart_app.route("/stats", methods=["GET"])
+@require_api_key
+async def stats():
+    return jsonify({
+        "context_cache": context_store.cache.stats(),
+        "bonzo_pool": bonzo_pool_stats.snapshot(quart_app.bonzo_session.connector),
+        "openai_rate_limits": rate_limiter.stats(),
+        "conversation_summaries": summarizer.stats(),
+        "response_cache": response_cache.stats(),
+        "prompt_cache": prompt_cache_stats.stats(),
+        "job_workers": worker_pool.stats(),
+        "single_flight": single_flight.stats(),
+        "usage_ledger": usage_ledger.stats(),
+        "context_write_behind": context_store.write_behind.stats(),
+        "prospect_cache": prospect_cache.stats() if prospect_cache is not None else None,
+        "prospect_history": prospect_history.stats() if prospect_history is not None else None,
+        "response_compression": response_compressor.stats()
+    }), 200
+
+@quart_app.route("/metrics", methods=["GET"])
+@require_api_key
+async def prometheus_metrics():
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@quart_app.route("/usage", methods=["GET"])
+@require_api_key
+async def usage_report():
+    # Aggregated tokens, cost and latency; defaults to the last 24 hours by tenant and prompt
+    try:
+        now = time.time()
+        end = float(request.args.get("end", now))
+        start = float(request.args.get("start", end - float(request.args.get("since", 86400))))
+        window = int(request.args["window"]) if request.args.get("window") else None
+    except ValueError:
+        return jsonify({"error": "start, end, since and window must be numbers"}), 400
+
+    group_by = tuple(name for name in request.args.get("group_by", "on_behalf_of,prompt_id").split(",") if name)
+    unknown = [name for name in group_by if name not in USAGE_DIMENSIONS]
+    if unknown or (window is not None and window <= 0):
+        return jsonify({"error": f"group_by must be drawn from {', '.join(USAGE_DIMENSIONS)} and window must be positive"}), 400
+
+    try:
+        results = await usage_ledger.query(start, end, group_by, window)
+        return jsonify({"start": start, "end": end, "group_by": group_by, "window": window, "results": results}), 200
+    except Exception as e:
+        logging.error(f"Error querying usage: {e}")
+        return jsonify({"error": f"Error querying usage: {str(e)}"}), 500
+
+def public_context(context):
+    # The embedding index is internal and not JSON serialisable
+    return {key: value for key, value in context.items() if key not in ("context_index", "index_embedder", "index_dim")}
+
+@quart_app.route("/prompts", methods=["GET"])
+@require_api_key
+async def list_prompts():
+    return jsonify({"prompts": prompt_registry.describe()}), 200
+
+@quart_app.route("/prompts", methods=["POST"])
+@require_api_key
+async def add_prompt():
+    try:
+        data = await request.json
+        prompt_id = data.get("prompt_id")
+        content = data.get("content")
+        tenant = data.get("tenant", None)
+
+        if prompt_id is None or not content or not isinstance(content, str):
+            return jsonify({"error": "Missing required fields: prompt_id and content are required."}), 400
+
+        entry = await prompt_registry.add(prompt_id, content, tenant)
+
+        logging.info(f"Prompt {prompt_id} v{entry['version']} registered for tenant {tenant or '*'}.")
+        return jsonify({key: value for key, value in entry.items() if key != "content"}), 200
+
+    except Exception as e:
+        logging.error(f"Error registering prompt: {e}")
+        return jsonify({"error": f"Error registering prompt: {str(e)}"}), 500
+
 @quart_app.route("/get_context/<id>", methods=["GET"])
 @require_api_key
 async def get_context(id):
@@ -101,19 +439,48 @@ async def get_context(id):
         if not id:
             return jsonify({"error": "Missing required field: id"}), 400
 
+        if is_reserved_id(id):
+            return jsonify({"error": RESERVED_ID_ERROR}), 400
+
         # Retrieve context from DynamoDB
-        context = context_store.get(id)
+        context = await context_store.get(id)
 
         if not context:
             return jsonify({"error": "No context found for the given id"}), 404
 
         logging.info(f"Context retrieved successfully for id {id}.")
-        return jsonify({"id": id, "context": context}), 200
+        return jsonify({"id": id, "context": public_context(context)}), 200
 
     except Exception as e:
         logging.error(f"Error retrieving context: {e}")
         return jsonify({"error": f"Error retrieving context: {str(e)}"}), 500
 
+@quart_app.route("/export/contexts", methods=["GET"])
+@require_api_key
+async def export_contexts():
+    # One JSON object per line, streamed while the table is scanned
+    fields = tuple(name for name in request.args.get("fields", ",".join(CONTEXT_EXPORT_FIELDS)).split(",") if name)
+    unknown = [name for name in fields if name not in CONTEXT_EXPORT_FIELDS]
+    if unknown:
+        return jsonify({"error": f"fields must be drawn from {', '.join(CONTEXT_EXPORT_FIELDS)}"}), 400
+
+    async def generate():
+        exported = 0
+        try:
+            async for item in context_store.iter_contexts(fields):
+                exported += 1
+                yield encode(item) + b"\n"
+        except Exception as e:
+            # Headers are already sent; a trailing error line marks the export as incomplete
+            logging.error(f"Context export failed after {exported} items: {e}")
+            yield encode({"error": f"Export failed after {exported} items"}) + b"\n"
+            return
+        logging.info(f"Exported {exported} contexts.")
+
+    response = await make_response(generate(), 200, {"Content-Type": "application/x-ndjson"})
+    response.timeout = None
+    return response
+
 @quart_app.route("/delete_context/<id>", methods=["DELETE"])
 @require_api_key
 async def delete_context(id):
@@ -121,8 +488,12 @@ async def delete_context(id):
         if not id:
             return jsonify({"error": "Missing required field: id"}), 400
 
+        if is_reserved_id(id):
+            return jsonify({"error": RESERVED_ID_ERROR}), 400
+
         # Delete context from DynamoDB
-        context_store.delete(id)
+        await context_store.delete(id)
+        response_cache.invalidate_context(id)
 
         logging.info(f"Context deleted successfully for id {id}.")
         return jsonify({"message": "Context deleted successfully.", "id": id}), 200
@@ -131,6 +502,39 @@ async def delete_context(id):
         logging.error(f"Error deleting context: {e}")
         return jsonify({"error": f"Error deleting context: {str(e)}"}), 500
 
+@quart_app.route("/delete_context/batch", methods=["POST"])
+@require_api_key
+async def delete_context_batch():
+    try:
+        data = await request.json
+        ids = data.get("ids")
+        write_behind = data.get("write_behind", CONTEXT_WRITE_BEHIND)
+
+        if not ids or not isinstance(ids, list) or not all(isinstance(id, str) and id for id in ids):
+            return jsonify({"error": "Missing required field: ids (list of non-empty strings)"}), 400
+
+        if len(ids) > CONTEXT_BATCH_MAX:
+            return jsonify({"error": f"A batch may contain at most {CONTEXT_BATCH_MAX} ids"}), 400
+
+        if any(is_reserved_id(id) for id in ids):
+            return jsonify({"error": RESERVED_ID_ERROR}), 400
+
+        ids = list(dict.fromkeys(ids))
+        await context_store.batch_delete(ids, write_behind=write_behind)
+        for id in ids:
+            response_cache.invalidate_context(id)
+
+        logging.info(f"Batch deleted {len(ids)} contexts.")
+        return jsonify({
+            "message": "Deletes accepted." if write_behind else "Contexts deleted successfully.",
+            "deleted": len(ids),
+            "write_behind": bool(write_behind)
+        }), 202 if write_behind else 200
+
+    except Exception as e:
+        logging.error(f"Error batch deleting contexts: {e}")
+        return jsonify({"error": f"Error batch deleting contexts: {str(e)}"}), 500
+
 async def gpt_schema_update(aclient, schema_type: str, original: dict, user_message: str) -> tuple[dict, dict]:
     prompt = [
         {
@@ -160,12 +564,17 @@ async def gpt_schema_update(aclient, schema_type: str, original: dict, user_mess
         }
     ]
 
-    response = await aclient.chat.completions.create(
-        model="gpt-4o",
-        messages=prompt,
-        max_tokens=16384
+    response = await rate_limiter.call(
+        "gpt-4o",
+        lambda: aclient.chat.completions.with_raw_response.create(
+            model="gpt-4o",
+            messages=prompt,
+            max_tokens=16384
+        ),
+        estimate_tokens(prompt)
     )
 
+    record_usage("gpt-4o", response.usage)
     raw = response.choices[0].message.content.strip()
 
     # Remove markdown code fences like ```json ... ```
@@ -200,73 +609,81 @@ async def gpt_schema_update(aclient, schema_type: str, original: dict, user_mess
 
         return {}, token_usage
 
-async def gpt_response(message_history, user_message, contexts=None, goal=None, tone_instructions=None, scope="all"):
-    try:
-
-        if scope == "all":
-            prospect_schema_changes, prospect_schema_token_usage = await gpt_schema_update(aclient, "prospect", {}, user_message)
-        elif scope == "prospect_info":
-            prospect_schema_changes, prospect_schema_token_usage = await gpt_schema_update(aclient, "prospect", {}, user_message)
+# Scopes that extract prospect fields from the newest message. Any other scope
+# (e.g. "reply_only") skips the extraction call entirely.
+SCHEMA_EXTRACTION_SCOPES = ("all", "prospect_info")
 
-        change_log = ""
+async def extract_prospect_schema(user_message, scope):
+    if scope not in SCHEMA_EXTRACTION_SCOPES:
+        return {}, {}
 
-        if contexts and isinstance(contexts, list):
-            context_str = "\n\n".join(contexts)
-            context_note = (
-                f"\n\nNote: The following relevant information has been supplied as context. "
-                "Use this to better understand the conversation.\n"
-                f"{context_str}"
-            )
-        else:
-            context_note = (
-                "\n\nNote: No additional context was supplied. "
-                "If the question is unrelated to the topic, politely guide the conversation back on track."
-            )
+    try:
+        with span("llm.schema_extraction"):
+            return await gpt_schema_update(aclient, "prospect", {}, user_message)
+    except Exception as e:
+        # A failed extraction must not take the reply down with it
+        logger.error(f"Prospect schema extraction failed: {e}")
+        return {}, {}
+
+def build_reply_messages(message_history, contexts=None, goal=None, tone_instructions=None, summary=None):
+    if contexts and isinstance(contexts, list):
+        context_str = "\n\n".join(contexts)
+        context_note = (
+            f"Note: The following relevant information has been supplied as context. "
+            "Use this to better understand the conversation.\n"
+            f"{context_str}"
+        )
+    else:
+        context_note = (
+            "Note: No additional context was supplied. "
+            "If the question is unrelated to the topic, politely guide the conversation back on track."
+        )
 
-        # Construct final context message
-        context_message = "".join([f"{msg['role']}: {msg['message']}\n" for msg in message_history])
-        context_message += context_note
+    # Construct final context message
+    context_message = ""
+    if summary:
+        context_message += f"Summary of the earlier conversation:\n{summary}\n\nMost recent messages:\n"
+    context_message += "".join([f"{msg['role']}: {msg['message']}\n" for msg in message_history])
+
+    # Shared guidelines, then per-id tone/goal and context, then this turn
+    return (
+        PromptBuilder()
+        .stable(REPLY_GUIDELINES_PROMPT)
+        .stable(f"{tone_instructions or DEFAULT_TONE_INSTRUCTIONS}\n\nThe goal of this conversation is: {goal}")
+        .stable(context_note)
+        .turn("user", context_message)
+        .build()
+    )
 
-        if change_log:
-            context_message += f"\n\nThe following updates were inferred from the conversation:\n{change_log}"
+def classify_conversation_status(parsed_sentiment):
+    # If GPT determines the question is off-topic, classify as 'out_of_scope'
+    if "I'm not sure" in parsed_sentiment.response or "I can't help with that" in parsed_sentiment.response:
+        return "out_of_scope"
+    return parsed_sentiment.conversation_status
 
-        response = await aclient.beta.chat.completions.parse(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"{tone_instructions or 'Provide clear, professional, and helpful responses in a conversational tone. Ensure accuracy while keeping interactions natural and engaging.'}\n\n"
-
-                        f"The goal of this conversation is: {goal}\n\n"
-
-                        "**Guidelines for Handling Conversations:**\n"
-                        "- **conversation_over** → Use this only if the user clearly states they have no further questions.\n"
-                        "- **human_intervention** → Escalate only if the user asks about scheduling, availability, or if no clear answer is found in the provided context.\n"
-                        "- **continue_conversation** → If the topic allows for further discussion, offer additional insights or ask if the user would like more details.\n"
-                        "- **out_of_scope** → If the user's question is unrelated, acknowledge it politely and redirect the conversation back to relevant topics.\n\n"
-
-                        "**Handling Out-of-Scope Questions:**\n"
-                        "If a user asks something unrelated, respond in a way that maintains a natural flow:\n"
-                        "👤 User: 'What's the best Italian restaurant nearby?'\n"
-                        "💬 Response: 'That sounds like a great topic! While I don't have restaurant recommendations, I'd be happy to assist with [specific topic]. Let me know how I can help!'\n\n"
-
-                        "If the user continues with off-topic questions, acknowledge their curiosity but steer the conversation back in a professional and engaging manner."
-                        "DO NOT USE EMOTICONS OR EMOJIS IN YOUR RESPONSES EVER.\n\n"
-                    )
-                },
-                {"role": "user", "content": context_message}
-            ],
-            response_format=Sentiment,
-            max_tokens=16384
-        )
+async def gpt_response(message_history, user_message, contexts=None, goal=None, tone_instructions=None, scope="all", summary=None):
+    # The reply does not depend on the extracted fields, so both calls run concurrently
+    extraction = asyncio.create_task(extract_prospect_schema(user_message, scope))
 
+    try:
+        messages = build_reply_messages(message_history, contexts, goal, tone_instructions, summary)
+        response = await timed("llm.reply", rate_limiter.call(
+            "gpt-4o",
+            lambda: aclient.beta.chat.completions.with_raw_response.parse(
+                model="gpt-4o",
+                messages=messages,
+                response_format=Sentiment,
+                max_tokens=16384
+            ),
+            estimate_tokens(messages)
+        ))
+
+        record_usage("gpt-4o", response.usage)
         parsed_sentiment = response.choices[0].message.parsed
         token_usage = response.usage.to_dict()
+        parsed_sentiment.conversation_status = classify_conversation_status(parsed_sentiment)
 
-        # If GPT determines the question is off-topic, classify as 'out_of_scope'
-        if "I'm not sure" in parsed_sentiment.response or "I can't help with that" in parsed_sentiment.response:
-            parsed_sentiment.conversation_status = "out_of_scope"
+        prospect_schema_changes, prospect_schema_token_usage = await extraction
 
         total_response_tokens = token_usage.get("total_tokens", 0)
         total_prospect_schema_tokens = prospect_schema_token_usage.get("total_tokens", 0)
@@ -295,6 +712,151 @@ async def gpt_response(message_history, user_message, contexts=None, goal=None,
     except Exception as e:
         logger.exception(f"Unexpected error: {e}")
         return {"error": "Unexpected error", "message": str(e)}, 400
+    finally:
+        # No-op once awaited; stops the extraction if the reply call failed
+        extraction.cancel()
+
+def partial_reply_text(snapshot):
+    # The structured output streams as JSON; read the "response" string so far
+    try:
+        partial = from_json(snapshot.encode(), partial_mode="trailing-strings")
+    except ValueError:
+        return ""
+    text = partial.get("response") if isinstance(partial, dict) else None
+    return text if isinstance(text, str) else ""
+
+async def gpt_response_stream(message_history, user_message, contexts=None, goal=None, tone_instructions=None, scope="all", summary=None):
+    extraction = asyncio.create_task(extract_prospect_schema(user_message, scope))
+
+    try:
+        messages = build_reply_messages(message_history, contexts, goal, tone_instructions, summary)
+        estimated_tokens = estimate_tokens(messages)
+        # Time until the stream is open; token delivery is left to the client
+        stream = await timed("llm.reply_stream_open", rate_limiter.call(
+            "gpt-4o",
+            lambda: aclient.beta.chat.completions.stream(
+                model="gpt-4o",
+                messages=messages,
+                response_format=Sentiment,
+                max_tokens=16384,
+                stream_options={"include_usage": True}
+            ).__aenter__(),
+            estimated_tokens
+        ))
+
+        streamed = ""
+        async with stream:
+            async for event in stream:
+                if event.type != "content.delta":
+                    continue
+                text = partial_reply_text(event.snapshot)
+                if len(text) > len(streamed) and text.startswith(streamed):
+                    yield "token", {"delta": text[len(streamed):]}
+                    streamed = text
+
+            completion = await stream.get_final_completion()
+
+        if completion.usage:
+            rate_limiter.for_model("gpt-4o").reconcile(estimated_tokens, completion.usage.total_tokens)
+            record_usage("gpt-4o", completion.usage)
+
+        parsed_sentiment = completion.choices[0].message.parsed
+        if parsed_sentiment.response.startswith(streamed) and len(parsed_sentiment.response) > len(streamed):
+            yield "token", {"delta": parsed_sentiment.response[len(streamed):]}
+
+        prospect_schema_changes, prospect_schema_token_usage = await extraction
+
+        yield "done", {
+            "response": parsed_sentiment.response,
+            "conversation_status": classify_conversation_status(parsed_sentiment),
+            "changes": {
+                "prospect_schema_data": prospect_schema_changes,
+            }
+        }
+
+    except RateLimitError as e:
+        logger.warning(f"Rate limit exceeded: {e}")
+        yield "error", {"error": "Rate limit exceeded", "message": str(e)}
+    except OpenAIError as e:
+        logger.error(f"OpenAI API error: {e}")
+        yield "error", {"error": "OpenAI API error", "message": str(e)}
+    except Exception as e:
+        logger.exception(f"Unexpected error: {e}")
+        yield "error", {"error": "Unexpected error", "message": str(e)}
+    finally:
+        extraction.cancel()
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def gpt_summarize(previous_summary, messages):
+    transcript = "".join(f"{msg.get('role')}: {message_text(msg)}\n" for msg in messages)
+    prompt = [
+        {
+            "role": "system",
+            "content": (
+                "You maintain a running summary of a conversation between a prospect (user) and an agent (assistant). "
+                "Update the existing summary with the new messages. Keep names, numbers, dates, commitments, "
+                "objections and open questions. Drop greetings and small talk. "
+                "Respond with the updated summary only, in at most 200 words."
+            )
+        },
+        {
+            "role": "user",
+            "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+        }
+    ]
+
+    response = await timed("llm.summary", rate_limiter.call(
+        SUMMARY_MODEL,
+        lambda: aclient.chat.completions.with_raw_response.create(
+            model=SUMMARY_MODEL,
+            messages=prompt,
+            max_tokens=1024
+        ),
+        estimate_tokens(prompt)
+    ))
+    record_usage(SUMMARY_MODEL, response.usage)
+    return response.choices[0].message.content.strip()
+
+summarizer = ConversationSummarizer(context_store, gpt_summarize)
+
+async def window_conversation(key, messages):
+    # Recent turns verbatim plus a stored summary of the rest. A stale summary
+    # is refreshed after the response so it never adds latency to this turn.
+    # Without a key there is nowhere to keep a summary, so the full history is sent.
+    if not key:
+        return None, messages
+    try:
+        summary, recent, stale = await summarizer.window(key, messages)
+    except Exception as e:
+        logger.error(f"Conversation windowing failed for {key}, sending full history: {e}")
+        return None, messages
+
+    if stale:
+        quart_app.add_background_task(summarizer.refresh, key, messages)
+    return summary, recent
+
+async def select_context(context, newest_message):
+    chunks = [str(chunk) for chunk in context.get("context", [])]
+    token_counts = context.get("context_tokens") or [count_tokens(chunk) for chunk in chunks]
+    budget = context.get("token_budget") or CONTEXT_TOKEN_BUDGET
+
+    if context.get("context_index") and context.get("index_embedder") == embedder.name and len(chunks) > CONTEXT_TOP_K:
+        # Only the top-k chunks by cosine similarity to the newest message are candidates
+        matrix = decode_index(context["context_index"], context["index_dim"])
+        query = await embedder.embed([newest_message])
+        indices, similarities = top_k(matrix, query[0], CONTEXT_TOP_K)
+        candidates = sorted(zip(indices.tolist(), similarities.tolist()))
+        chunks = [chunks[i] for i, _ in candidates]
+        token_counts = [token_counts[i] for i, _ in candidates]
+        scores = [similarity for _, similarity in candidates]
+    else:
+        scores = keyword_scores(chunks, newest_message)
+
+    selected, used = pack_context(chunks, token_counts, budget, scores)
+    logger.info(f"Selected {len(selected)} of {len(context.get('context', []))} context chunks ({used}/{budget} tokens)")
+    return selected
 
 @quart_app.route('/message-teli-data', methods=['POST'])
 @require_api_key
@@ -312,15 +874,72 @@ async def message_teli_data():
         if not all([id, message_history]):
             return jsonify({"error": "Missing required fields"}), 400
 
+        if is_reserved_id(id):
+            return jsonify({"error": RESERVED_ID_ERROR}), 400
+
+        usage_ledger.tag(context_id=id)
         newest_message = message_history[-1]["message"]
-        context = context_store.get(id)
+        with span("dynamo.get_context"):
+            context = await context_store.get(id)
+        # Summaries are only kept for conversations the caller identifies; a key
+        # derived from the history would be shared by every campaign that opens
+        # with the same template. Conversation ids are the caller's, so they are
+        # scoped by context id.
+        conversation_id = data.get("conversation_id")
+        summary_key = f"{id}#{conversation_id}" if conversation_id else None
 
         if not context:
             logger.info(f"No context found for id {id}. Using GPT alone.")
             return jsonify({"error": "No context found for the given id"}), 404
 
         logger.info("Using supplied context for GPT response.")
-        gpt_response_data = await gpt_response(message_history, newest_message, context, goal=goal, tone_instructions=tone, scope=scope)
+        stream = data.get("stream") or "text/event-stream" in request.headers.get("Accept", "")
+
+        # Opt-in cache for repeated FAQ-style questions against the same context
+        use_cache = data.get("cache", RESPONSE_CACHE_ENABLED)
+        cached = await response_cache.get(id, goal, tone, scope, message_history, newest_message) if use_cache else None
+
+        if stream:
+            async def generate():
+                if cached is not None:
+                    yield sse_event("token", {"delta": cached["response"]})
+                    yield sse_event("done", cached)
+                    return
+
+                summary, recent_history = await window_conversation(summary_key, message_history)
+                contexts = await select_context(context, newest_message)
+                async for event, payload in gpt_response_stream(recent_history, newest_message, contexts, goal=goal, tone_instructions=tone, scope=scope, summary=summary):
+                    if event == "done" and use_cache and payload["conversation_status"] in CACHEABLE_STATUSES:
+                        await response_cache.set(id, goal, tone, scope, message_history, newest_message, payload)
+                    yield sse_event(event, payload)
+
+            response = await make_response(generate(), 200, {
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
+            })
+            response.timeout = None
+            return response
+
+        async def generate_reply():
+            summary, recent_history = await window_conversation(summary_key, message_history)
+            contexts = await select_context(context, newest_message)
+            result = await gpt_response(recent_history, newest_message, contexts, goal=goal, tone_instructions=tone, scope=scope, summary=summary)
+            if not isinstance(result, tuple) and use_cache and result["conversation_status"] in CACHEABLE_STATUSES:
+                await response_cache.set(id, goal, tone, scope, message_history, newest_message, result)
+            return result
+
+        if cached is not None:
+            gpt_response_data = cached
+        else:
+            # Concurrent calls for the same id and history share one gpt-4o call
+            dedup_key = request_fingerprint("message_teli_data", id, conversation_id, goal, tone, scope, history_fingerprint(message_history))
+            gpt_response_data = await single_flight.do(dedup_key, generate_reply, remember=lambda result: not isinstance(result, tuple))
+
+            # gpt_response returns (error, status) when the OpenAI call fails
+            if isinstance(gpt_response_data, tuple):
+                error, status = gpt_response_data
+                return jsonify(error), status
 
         # Handle response
         conversation_status = gpt_response_data["conversation_status"]
@@ -343,40 +962,35 @@ async def message_teli_data():
 class Response(BaseModel):
     response: str
 
-async def gpt_response_2(message_history, prospect_data, notes_content, prompt_id) -> dict:
+async def gpt_response_2(message_history, prospect_data, notes_content, prompt, summary=None) -> dict:
     try:
-        messages = [
-            {
-                "role": "system",
-                "content": prompts[prompt_id]
-            }
-        ]
-
-        # Add prospect data as context if available
-        if prospect_data:
-            messages.append({
-                "role": "system",
-                "content": f"Prospect Data: {json.dumps(prospect_data)}"
-            })
-
-        # Add prospect notes if available
-        if notes_content:
-            messages.append({
-                "role": "system",
-                "content": f"Prospect Notes: {json.dumps(notes_content)}"
-            })
-
-        # Add message history (filter out messages with empty content)
-        valid_messages = [msg for msg in message_history if msg.get("content") and msg.get("content").strip()]
-        messages.extend(valid_messages)
-
-        response = await aclient.beta.chat.completions.parse(
-            model="gpt-4.1-mini",
-            messages=messages,
-            response_format=Response,
-            max_tokens=16384
+        # Prompt, prospect data and notes change rarely and form the cached
+        # prefix; the summary and message history follow
+        builder = (
+            PromptBuilder()
+            .stable(prompt["content"])
+            .data("Prospect Data", prospect_data)
+            .data("Prospect Notes", notes_content)
+            .stable(f"Summary of the earlier conversation: {summary}" if summary else None)
         )
 
+        # Add message history (filter out messages with empty content)
+        for msg in message_history:
+            builder.turn(msg.get("role"), msg.get("content"))
+        messages = builder.build()
+
+        response = await timed("llm.reply", rate_limiter.call(
+            "gpt-4.1-mini",
+            lambda: aclient.beta.chat.completions.with_raw_response.parse(
+                model="gpt-4.1-mini",
+                messages=messages,
+                response_format=Response,
+                max_tokens=16384
+            ),
+            estimate_tokens(messages)
+        ))
+
+        record_usage("gpt-4.1-mini", response.usage)
         parsed_response = response.choices[0].message.parsed
         token_usage = response.usage.to_dict()
 
@@ -393,6 +1007,65 @@ async def gpt_response_2(message_history, prospect_data, notes_content, prompt_i
         logger.error(f"Error generating response: {e}")
         return {"error": str(e)}
 
+async def process_ai_message(prospect_id, prompt, on_behalf_of, auth_token):
+    headers = bonzo_headers(auth_token, on_behalf_of)
+    session = quart_app.bonzo_session
+    usage_ledger.tag(prompt_id=prompt["prompt_id"], on_behalf_of=on_behalf_of)
+
+    try:
+        # Communication history, prospect info and notes are independent
+        message_history, prospect_data, notes_content = await fetch_prospect_context(session, prospect_id, headers, prospect_cache, prospect_history)
+
+        # Duplicate webhooks for one inbound SMS share the history up to that SMS,
+        # including retries that land after our reply was appended
+        dedup_key = request_fingerprint(
+            "send_ai_message", on_behalf_of, prospect_id, prompt["prompt_id"], prompt["version"],
+            history_fingerprint(through_last_inbound(message_history))
+        )
+        return await single_flight.do(
+            dedup_key,
+            lambda: reply_to_prospect(session, headers, prospect_id, prompt, message_history, prospect_data, notes_content),
+            remember=lambda result: result[1] == 200
+        )
+
+    except BonzoAPIError as e:
+        return {"error": e.message}, e.status
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out calling the Bonzo API for prospect {prospect_id}")
+        return {"error": "Timed out calling the Bonzo API"}, 504
+    except aiohttp.ClientError as e:
+        logger.error(f"HTTP client error: {e}")
+        return {"error": "Network error occurred"}, 500
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode error: {e}")
+        return {"error": "Invalid response format from API"}, 500
+
+def through_last_inbound(message_history):
+    for i in range(len(message_history) - 1, -1, -1):
+        if message_history[i]["role"] == "user":
+            return message_history[:i + 1]
+    return message_history
+
+async def reply_to_prospect(session, headers, prospect_id, prompt, message_history, prospect_data, notes_content):
+    # Prospect ids are only unique per Bonzo user
+    summary, message_history = await window_conversation(f"prospect#{headers.get('On-Behalf-Of')}#{prospect_id}", message_history)
+
+    # Generate GPT response
+    gpt_response_data = await gpt_response_2(message_history, prospect_data, notes_content, prompt, summary=summary)
+
+    if "error" in gpt_response_data:
+        logger.error(f"GPT response generation failed: {gpt_response_data['error']}")
+        return {"error": "Failed to generate AI response"}, 500
+
+    # Send message
+    with span("bonzo.send_sms"):
+        await send_sms(session, prospect_id, headers, gpt_response_data["response"])
+    return {
+        "success": True,
+        "message_sent": gpt_response_data["response"],
+        # "token_usage": gpt_response_data["token_usage"]
+    }, 200
+
 @quart_app.route('/send_ai_message', methods=['POST'])
 @require_api_key
 async def send_ai_message():
@@ -406,115 +1079,223 @@ async def send_ai_message():
         if not all([prospect_id, prompt_id, on_behalf_of, auth_token]):
             return jsonify({"error": "Missing required fields: prospect_id, prompt_id, on_behalf_of, and auth_token"}), 400
 
-        url = f'https://app.getbonzo.com/api/v3/prospects/{prospect_id}/sms'
-        comm_history = f'https://app.getbonzo.com/api/v3/prospects/{prospect_id}/communication'
-        prospect_info = f'https://app.getbonzo.com/api/v3/prospects/{prospect_id}'
-        prospect_notes = f'https://app.getbonzo.com/api/v3/prospects/{prospect_id}/notes'
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {auth_token}",
-            "On-Behalf-Of": on_behalf_of
+        # Webhook callers opt into 202 + job id so they don't time out and retry
+        run_async = data.get("async", False) or "respond-async" in request.headers.get("Prefer", "")
+        callback_url = data.get("callback_url")
+        idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+
+        if callback_url and not callback_url.startswith(("https://", "http://")):
+            return jsonify({"error": "callback_url must be an http(s) URL"}), 400
+
+        # Reject unknown prompts before any network I/O
+        prompt = await prompt_registry.resolve(prompt_id, on_behalf_of)
+        if not prompt:
+            return jsonify({"error": f"Unknown prompt_id: {prompt_id}"}), 400
+
+        if not (run_async or callback_url or idempotency_key):
+            body, status = await process_ai_message(prospect_id, prompt, on_behalf_of, auth_token)
+            return jsonify(body), status
+
+        fields = {
+            "prospect_id": prospect_id,
+            "prompt_id": prompt["prompt_id"],
+            "prompt_version": prompt["version"],
+            "on_behalf_of": on_behalf_of,
+            "callback_url": callback_url
         }
+        if idempotency_key:
+            # A retried webhook gets the original job instead of a second SMS
+            job, created = await job_store.create_once("send_ai_message", f"{on_behalf_of}:{idempotency_key}", **fields)
+            if not created:
+                return ai_message_job_response(job, replayed=True)
+        else:
+            job = await job_store.create("send_ai_message", **fields)
 
-        message_history = []
+        if not (run_async or callback_url):
+            # Shielded so a client that disconnects doesn't cancel the job halfway
+            # and leave it "running"; it finishes and a retry replays its result
+            task = asyncio.create_task(run_ai_message_job(job["job_id"], prospect_id, prompt, on_behalf_of, auth_token))
+            quart_app.background_tasks.add(task)
+            task.add_done_callback(quart_app.background_tasks.discard)
+            await asyncio.shield(task)
+            return ai_message_job_response(await job_store.get(job["job_id"]))
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                # Get communication history
-                async with session.get(comm_history, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to fetch communication history: {response.status}")
-                        return jsonify({"error": f"Failed to fetch communication history: {response.status}"}), 500
-
-                    response_data = await response.json()
-                    data = response_data.get("data")
-
-                    if not data:
-                        logger.warning(f"No communication history found for prospect {prospect_id}")
-                        return jsonify({"error": "No communication history found"}), 404
-
-                    # Build message history
-                    for item in data:
-                        if item.get("content"):  # Only add messages with content
-                            message_history.append({
-                                "role": "user" if item.get("direction") == "incoming" else "assistant",
-                                "content": item.get("content")
-                            })
-
-                if not message_history:
-                    logger.warning(f"No valid messages found in communication history for prospect {prospect_id}")
-                    return jsonify({"error": "No valid messages found in communication history"}), 404
-
-                # Get prospect data
-                async with session.get(prospect_info, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to fetch prospect info: {response.status}")
-                        return jsonify({"error": f"Failed to fetch prospect info: {response.status}"}), 500
-
-                    res = await response.json()
-                    prospect_data = res.get("data")
-
-                if not prospect_data:
-                    logger.warning(f"No prospect info found for prospect {prospect_id}")
-                    return jsonify({"error": "No prospect info found"}), 404
-
-                # Get prospect notes
-                notes_content = []
-                async with session.get(prospect_notes, headers=headers) as response:
-                    if response.status == 200:
-                        notes_response = await response.json()
-                        notes_data = notes_response.get("data", [])
-                        # Extract just the content from each note
-                        notes_content = [note.get("content", "") for note in notes_data if note.get("content")]
-                    else:
-                        logger.warning(f"Failed to fetch prospect notes: {response.status}")
-
-                # Generate GPT response
-                gpt_response_data = await gpt_response_2(message_history, prospect_data, notes_content, prompt_id)
-
-                if "error" in gpt_response_data:
-                    logger.error(f"GPT response generation failed: {gpt_response_data['error']}")
-                    return jsonify({"error": "Failed to generate AI response"}), 500
-
-                # Send message
-                payload = {
-                    "message": gpt_response_data["response"],
-                    "send_as": "owner"
-                }
-
-                async with session.post(url, headers=headers, json=payload) as send_response:
-                    if send_response.status != 200:
-                        logger.error(f"Failed to send message: {await send_response.json()}")
-                        logger.error(f"Failed to send message: {send_response.status}")
-                        return jsonify({"error": f"Failed to send message: {send_response.status}"}), 500
-
-                    await send_response.json()
-                    return jsonify({
-                        "success": True,
-                        "message_sent": gpt_response_data["response"],
-                        # "token_usage": gpt_response_data["token_usage"]
-                    }), 200
-
-            except aiohttp.ClientError as e:
-                logger.error(f"HTTP client error: {e}")
-                return jsonify({"error": "Network error occurred"}), 500
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}")
-                return jsonify({"error": "Invalid response format from API"}), 500
+        if not worker_pool.submit(run_ai_message_job, job["job_id"], prospect_id, prompt, on_behalf_of, auth_token, callback_url):
+            # Nothing ran, so a retry with the same Idempotency-Key must start afresh
+            await job_store.delete(job["job_id"])
+            return jsonify({"error": "Job queue is full, retry later"}), 503
+
+        return ai_message_job_response(job)
 
     except Exception as e:
         logger.error(f"Unexpected error in send_ai_message: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
+def ai_message_job_response(job, replayed=False):
+    if job is None:
+        return jsonify({"error": "Job expired before completion"}), 500
+
+    # Finished jobs replay their stored result; anything else reports progress
+    if "result" in job:
+        response = jsonify(job["result"])
+        status = job["http_status"]
+    else:
+        response = jsonify({
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/send_ai_message/jobs/{job['job_id']}"
+        })
+        status = 202
+    response.headers["X-Job-Id"] = job["job_id"]
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response, status
+
+async def run_ai_message_job(job_id, prospect_id, prompt, on_behalf_of, auth_token, callback_url=None):
+    usage_ledger.begin("send_ai_message_job")
+    await job_store.update(job_id, status="running")
+    try:
+        body, status = await process_ai_message(prospect_id, prompt, on_behalf_of, auth_token)
+    except asyncio.CancelledError:
+        # e.g. shutdown; a job stuck in "running" would answer every retry with
+        # a 202 until it expired, so release its idempotency key instead
+        logger.warning(f"send_ai_message job {job_id} cancelled")
+        await job_store.delete(job_id)
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in send_ai_message job {job_id}: {e}")
+        body, status = {"error": "An unexpected error occurred"}, 500
+
+    job = await job_store.update(job_id, status="completed" if status == 200 else "failed", result=body, http_status=status)
+    if callback_url and job:
+        callback_status = await worker_pool.post_callback(callback_url, job)
+        await job_store.update(job_id, callback_status=callback_status)
+
+@quart_app.route('/send_ai_message/jobs/<job_id>', methods=['GET'])
+@require_api_key
+async def send_ai_message_job_status(job_id):
+    job = await job_store.get(job_id)
+    if not job:
+        return jsonify({"error": "No job found for the given job_id"}), 404
+
+    return jsonify(job), 200
+
+async def run_ai_message_batch(prospect_ids, prompt, on_behalf_of, auth_token, job_id=None):
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    completed = 0
+
+    async def run_one(prospect_id):
+        nonlocal completed
+        async with semaphore:
+            try:
+                body, status = await process_ai_message(prospect_id, prompt, on_behalf_of, auth_token)
+            except Exception as e:
+                logger.error(f"Unexpected error in batch send for prospect {prospect_id}: {e}")
+                body, status = {"error": "An unexpected error occurred"}, 500
+
+        completed += 1
+        if job_id:
+            await job_store.update(job_id, completed=completed)
+        return {"prospect_id": prospect_id, "status": status, **body}
+
+    results = await asyncio.gather(*(run_one(prospect_id) for prospect_id in prospect_ids))
+    summary = {
+        "total": len(results),
+        "succeeded": sum(1 for result in results if result["status"] == 200),
+        "failed": sum(1 for result in results if result["status"] != 200)
+    }
+    return summary, results
+
+async def run_ai_message_batch_job(job_id, prospect_ids, prompt, on_behalf_of, auth_token):
+    await job_store.update(job_id, status="running")
+    try:
+        summary, results = await run_ai_message_batch(prospect_ids, prompt, on_behalf_of, auth_token, job_id=job_id)
+        await job_store.update(job_id, status="completed", summary=summary, results=results)
+    except Exception as e:
+        logger.error(f"Batch job {job_id} failed: {e}")
+        await job_store.update(job_id, status="failed", error=str(e))
+
+@quart_app.route('/send_ai_message/batch', methods=['POST'])
+@require_api_key
+async def send_ai_message_batch():
+    try:
+        data = await request.json
+        prospects = data.get("prospects")
+        prompt_id = data.get("prompt_id")
+        on_behalf_of = data.get("on_behalf_of")
+        auth_token = data.get("auth_token")
+        background = data.get("background", False)
+
+        if not all([prospects, prompt_id, on_behalf_of, auth_token]) or not isinstance(prospects, list):
+            return jsonify({"error": "Missing required fields: prospects (list), prompt_id, on_behalf_of, and auth_token"}), 400
+
+        # Accept either bare ids or {"prospect_id": ...} objects
+        prospect_ids = [p.get("prospect_id") if isinstance(p, dict) else p for p in prospects]
+        if not all(prospect_ids):
+            return jsonify({"error": "Every prospect must have a prospect_id"}), 400
+
+        if len(prospect_ids) > BATCH_MAX_PROSPECTS:
+            return jsonify({"error": f"A batch may contain at most {BATCH_MAX_PROSPECTS} prospects"}), 400
+
+        prompt = await prompt_registry.resolve(prompt_id, on_behalf_of)
+        if not prompt:
+            return jsonify({"error": f"Unknown prompt_id: {prompt_id}"}), 400
+
+        if background:
+            job = await job_store.create("send_ai_message_batch", total=len(prospect_ids), completed=0)
+            quart_app.add_background_task(run_ai_message_batch_job, job["job_id"], prospect_ids, prompt, on_behalf_of, auth_token)
+            return jsonify({"job_id": job["job_id"], "status": job["status"], "total": len(prospect_ids)}), 202
+
+        summary, results = await run_ai_message_batch(prospect_ids, prompt, on_behalf_of, auth_token)
+        return jsonify({**summary, "results": results}), 200
+
+    except Exception as e:
+        logger.error(f"Unexpected error in send_ai_message_batch: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@quart_app.route('/send_ai_message/batch/<job_id>', methods=['GET'])
+@require_api_key
+async def send_ai_message_batch_status(job_id):
+    job = await job_store.get(job_id)
+    if not job:
+        return jsonify({"error": "No job found for the given job_id"}), 404
+
+    return jsonify(job), 200
+
+# Containers kept warm; 0 scales to zero and relies on the memory snapshot
+MODAL_MIN_CONTAINERS = int(os.environ.get("MODAL_MIN_CONTAINERS", "0"))
+
+def preload():
+    # Work that needs no network or credentials, captured in the memory snapshot:
+    # the tokenizer and the OpenAI SDK's lazily imported resource modules
+    count_tokens("warm up")
+    _ = (aclient.chat.completions, aclient.beta.chat.completions, aclient.embeddings)
+
 # For deployment with Modal
+@modal_app.cls(
+    image=image,
+    secrets=[Secret.from_name("rad-integration-secrets")],
+    enable_memory_snapshot=True,
+    min_containers=MODAL_MIN_CONTAINERS
+)
+class RadIntegration:
+    @enter(snap=True)
+    def snapshot(self):
+        preload()
+
+    # Label keeps the URL the old quart_asgi_app function was served on
+    @asgi_app(label="rad-integration-quart-asgi-app")
+    def quart_asgi_app(self):
+        return quart_app
+
+# Table provisioning is an explicit step: modal run app.py::provision_tables
 @modal_app.function(
     image=image,
     secrets=[Secret.from_name("rad-integration-secrets")]
 )
-@asgi_app()
-def quart_asgi_app():
-    return quart_app
+def provision_tables():
+    for table_name in TABLE_NAMES:
+        ensure_dynamo_table(table_name)
 
 # Local entrypoint for running the app
 @modal_app.local_entrypoint()
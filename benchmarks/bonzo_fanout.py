@@ -0,0 +1,50 @@
+"""Sequential vs concurrent Bonzo prospect fetches against a local stub.
+
+    python -m benchmarks.bonzo_fanout --latency 0.05 --iterations 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from benchmarks.fakes import FakeBonzoAPI
+from services import bonzo
+
+
+async def sequential(session, prospect_id, headers):
+    message_history = await bonzo.fetch_communication_history(session, prospect_id, headers)
+    prospect_data = await bonzo.fetch_prospect(session, prospect_id, headers)
+    notes_content = await bonzo.fetch_notes(session, prospect_id, headers)
+    return message_history, prospect_data, notes_content
+
+
+async def timed(label, fetch, session, iterations, headers):
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await fetch(session, f"p-{i}", headers)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:>10}: mean={statistics.mean(timings):7.2f}ms  p50={statistics.median(timings):7.2f}ms  max={max(timings):7.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    fake = FakeBonzoAPI(latency=args.latency)
+    bonzo.BONZO_API_BASE = await fake.start()
+    headers = bonzo.bonzo_headers("token", "owner@example.com")
+    try:
+        async with aiohttp.ClientSession() as session:
+            await timed("sequential", sequential, session, args.iterations, headers)
+            await timed("fan-out", bonzo.fetch_prospect_context, session, args.iterations, headers)
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
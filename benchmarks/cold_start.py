@@ -0,0 +1,89 @@
+"""Cold start: time from process start to the first served request.
+
+Spawns a fresh interpreter that imports app.py against local stand-ins and
+serves it with hypercorn, then polls /stats until it answers. Reports the
+child's import time and the end-to-end time to the first 200, averaged over
+several runs. --dynamo-latency adds a per-call delay to the DynamoDB stand-in
+so any round trip left on the startup path shows up in the numbers.
+
+    python -m benchmarks.cold_start --runs 5 --dynamo-latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from benchmarks.harness import API_KEY
+
+
+async def child(port, dynamo_latency):
+    started = time.perf_counter()
+    from benchmarks.harness import load_app, serve
+
+    app = load_app("http://127.0.0.1:9/v1", dynamo_latency=dynamo_latency)
+    print(json.dumps({"import_seconds": time.perf_counter() - started}), flush=True)
+    async with serve(app.quart_app, port=port):
+        await asyncio.Event().wait()
+
+
+async def first_request(port, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/stats", headers={"X-API-Key": API_KEY}) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.01)
+    raise TimeoutError("app did not start")
+
+
+async def run_once(port, dynamo_latency):
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), AWS_REGION_NAME="us-east-1")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child", "--port", str(port), "--dynamo-latency", str(dynamo_latency)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, text=True
+    )
+    try:
+        await first_request(port)
+        ready = time.perf_counter() - started
+        import_seconds = json.loads(process.stdout.readline())["import_seconds"]
+        return import_seconds, ready
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--dynamo-latency", type=float, default=0.05)
+    parser.add_argument("--child", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        await child(args.port, args.dynamo_latency)
+        return
+
+    imports, ready = [], []
+    for _ in range(args.runs):
+        import_seconds, ready_seconds = await run_once(args.port, args.dynamo_latency)
+        imports.append(import_seconds)
+        ready.append(ready_seconds)
+
+    print(f"import app.py:        median {statistics.median(imports) * 1000:7.1f}ms  max {max(imports) * 1000:7.1f}ms")
+    print(f"first served request: median {statistics.median(ready) * 1000:7.1f}ms  max {max(ready) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Context write throughput: one put_item per id vs batched and write-behind.
+
+Writes the same set of contexts to a local DynamoDB stand-in three ways:
+one update_message_context call per id (what a CRM sync did via
+/upload_context), batch_write with 25-item BatchWriteItem calls, and the
+write-behind buffer, timed until the buffer has been flushed.
+
+    python -m benchmarks.context_batch_write --items 2000 --latency 0.01
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakes import FakeDynamoTable
+from repository.context import MessageContextBonzo, context_item
+
+
+def make_items(count):
+    return [
+        context_item(f"ctx-{i}", [f"chunk {i}-{n}" for n in range(5)], "book a call", "friendly", [], [3] * 5)
+        for i in range(count)
+    ]
+
+
+async def timed(label, items, table, write):
+    start = time.perf_counter()
+    await write()
+    elapsed = time.perf_counter() - start
+    calls = getattr(table, "batch_requests", 0) or len(items)
+    print(f"{label:>12}: {len(items) / elapsed:9.1f} items/s  {elapsed:6.2f}s  {calls} DynamoDB calls  {len(table.items)} stored")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+
+    table = FakeDynamoTable(latency=args.latency)
+    store = MessageContextBonzo(table=table)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def put_one(item):
+        async with semaphore:
+            await store.update_message_context(item["id"], item["context"], item["goal"], item["tone"], item["schema_context"], item["context_tokens"])
+
+    async def put_each():
+        await asyncio.gather(*(put_one(item) for item in items))
+
+    await timed("put_item", items, table, put_each)
+    store.close()
+
+    table = FakeDynamoTable(latency=args.latency)
+    store = MessageContextBonzo(table=table)
+    await timed("batch", items, table, lambda: store.batch_update_message_contexts(items))
+    store.close()
+
+    table = FakeDynamoTable(latency=args.latency)
+    store = MessageContextBonzo(table=table)
+
+    async def write_behind():
+        start = time.perf_counter()
+        await store.batch_update_message_contexts(items, write_behind=True)
+        print(f"{'':>12}  write-behind acknowledged in {(time.perf_counter() - start) * 1000:.2f}ms")
+        await store.write_behind.flush()
+
+    await timed("write-behind", items, table, write_behind)
+    store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
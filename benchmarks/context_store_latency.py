@@ -0,0 +1,76 @@
+"""Event-loop latency of MessageContextBonzo under concurrent load.
+
+Runs the same burst of context reads twice against a local DynamoDB stand-in:
+once calling the table directly from the loop (the old behaviour) and once
+through the executor-backed async store. A ticker coroutine measures how late
+the loop wakes it up while the burst is in flight.
+
+    python -m benchmarks.context_store_latency --requests 200 --latency 0.02
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fakes import FakeDynamoTable
+from repository.context import MessageContextBonzo
+
+
+async def measure_lag(stop, interval, samples):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+
+async def run(label, read, requests, concurrency):
+    stop = asyncio.Event()
+    lag = []
+    ticker = asyncio.create_task(measure_lag(stop, 0.005, lag))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await read(f"ctx-{i % 10}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    lag_ms = sorted(x * 1000 for x in lag) or [0.0]
+    print(
+        f"{label:>10}: {requests / elapsed:8.1f} req/s  "
+        f"loop lag p50={statistics.median(lag_ms):7.2f}ms "
+        f"p99={lag_ms[int(len(lag_ms) * 0.99) - 1]:7.2f}ms "
+        f"max={lag_ms[-1]:7.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    table = FakeDynamoTable(latency=args.latency)
+    for i in range(10):
+        table.put_item(Item={"id": f"ctx-{i}", "context": ["benchmark context"], "goal": "", "tone": "", "schema_context": []})
+
+    async def blocking_read(id):
+        return table.get_item(Key={"id": id})
+
+    store = MessageContextBonzo(table=table, max_workers=args.workers)
+    try:
+        await run("blocking", blocking_read, args.requests, args.concurrency)
+        await run("executor", store.get, args.requests, args.concurrency)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,408 @@
+import re
+import copy
+import json
+import time
+import zlib
+import asyncio
+import threading
+from decimal import Decimal
+from aiohttp import web
+from botocore.exceptions import ClientError
+
+# DynamoDB rejects items larger than this
+MAX_ITEM_BYTES = 400 * 1024
+
+
+def item_size(value):
+    # Approximates DynamoDB's item size accounting: attribute names plus
+    # UTF-8 strings, raw binary and roughly one byte per two digits of a number
+    if isinstance(value, dict):
+        return sum(len(name.encode()) + item_size(item) for name, item in value.items()) + 3
+    if isinstance(value, (list, tuple)):
+        return sum(item_size(item) + 1 for item in value) + 3
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "value") and isinstance(value.value, bytes):
+        return len(value.value)
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return len(str(value)) // 2 + 2
+    return 1
+
+def check_item_size(item, operation):
+    if item_size(item) > MAX_ITEM_BYTES:
+        raise ClientError(
+            {"Error": {"Code": "ValidationException", "Message": "Item size has exceeded the maximum allowed size"}},
+            operation
+        )
+
+def condition_matches(condition, item):
+    # Evaluates the boto3.dynamodb.conditions used by the repository (Attr
+    # comparisons joined with & | ~), plus the plain-string attribute_exists /
+    # attribute_not_exists checks. Like boto3, float operands are rejected.
+    if isinstance(condition, str):
+        match = re.fullmatch(r"\s*(attribute_exists|attribute_not_exists)\((\w+)\)\s*", condition)
+        if match is None:
+            raise NotImplementedError(f"FakeDynamoTable does not support the condition {condition!r}")
+        return (match.group(2) in item) == (match.group(1) == "attribute_exists")
+
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "AND":
+        return all(condition_matches(value, item) for value in values)
+    if operator == "OR":
+        return any(condition_matches(value, item) for value in values)
+    if operator == "NOT":
+        return not condition_matches(values[0], item)
+
+    for operand in values[1:]:
+        if isinstance(operand, float):
+            raise TypeError("Float types are not supported. Use Decimal types instead.")
+    name = values[0].name
+    if operator == "attribute_not_exists":
+        return name not in item
+    if operator == "attribute_exists":
+        return name in item
+    if name not in item:
+        return False
+    value = item[name]
+    if operator == "=":
+        return value == values[1]
+    if operator == "<>":
+        return value != values[1]
+    if operator == "<":
+        return value < values[1]
+    if operator == "<=":
+        return value <= values[1]
+    if operator == ">":
+        return value > values[1]
+    if operator == ">=":
+        return value >= values[1]
+    if operator == "BETWEEN":
+        return values[1] <= value <= values[2]
+    if operator == "begins_with":
+        return value.startswith(values[1])
+    raise NotImplementedError(f"FakeDynamoTable does not support {operator} conditions")
+
+def check_condition(condition, item, operation):
+    if condition is not None and not condition_matches(condition, item or {}):
+        raise ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+            operation
+        )
+
+
+class FakeDynamoTable:
+    # In-memory stand-in for a boto3 DynamoDB Table resource. Every call
+    # blocks the calling thread for `latency` seconds, like a real round trip.
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_item(self, Key, **kwargs):
+        self._wait()
+        with self.lock:
+            item = self.items.get(Key["id"])
+        return {"Item": copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item, ReturnValues=None, ConditionExpression=None, **kwargs):
+        self._wait()
+        check_item_size(Item, "PutItem")
+        with self.lock:
+            old = self.items.get(Item["id"])
+            check_condition(ConditionExpression, old, "PutItem")
+            self.items[Item["id"]] = copy.deepcopy(Item)
+        return {"Attributes": old} if old is not None and ReturnValues == "ALL_OLD" else {}
+
+    def delete_item(self, Key, ConditionExpression=None, **kwargs):
+        self._wait()
+        with self.lock:
+            check_condition(ConditionExpression, self.items.get(Key["id"]), "DeleteItem")
+            old = self.items.pop(Key["id"], None)
+        return {"Attributes": old} if old is not None else {}
+
+    def scan(self, Segment=0, TotalSegments=1, Limit=None, ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None, FilterExpression=None, **kwargs):
+        # Paginated like DynamoDB: ids are split into segments by hash and
+        # pages end after Limit items (100 by default, standing in for 1 MB).
+        # FilterExpression applies after the page is read, so pages can be short.
+        self._wait()
+        with self.lock:
+            ids = sorted(id for id in self.items if zlib.crc32(id.encode()) % TotalSegments == Segment)
+            if ExclusiveStartKey is not None:
+                ids = [id for id in ids if id > ExclusiveStartKey["id"]]
+            page = ids[:Limit or 100]
+            items = copy.deepcopy([self.items[id] for id in page])
+        if FilterExpression is not None:
+            items = [item for item in items if condition_matches(FilterExpression, item)]
+
+        if ProjectionExpression:
+            names = ExpressionAttributeNames or {}
+            fields = [names.get(field.strip(), field.strip()) for field in ProjectionExpression.split(",")]
+            items = [{field: item[field] for field in fields if field in item} for item in items]
+
+        response = {"Items": items}
+        if len(ids) > len(page):
+            response["LastEvaluatedKey"] = {"id": page[-1]}
+        return response
+
+    def batch_writer(self, **kwargs):
+        return FakeBatchWriter(self)
+
+
+class FakeBatchWriter:
+    # Buffers writes like boto3's BatchWriter and pays one round trip per
+    # BatchWriteItem call of up to 25 items.
+    def __init__(self, table, flush_amount=25):
+        self.table = table
+        self.flush_amount = flush_amount
+        self.pending = []
+
+    def put_item(self, Item):
+        self.pending.append(("put", copy.deepcopy(Item)))
+        if len(self.pending) >= self.flush_amount:
+            self._flush()
+
+    def delete_item(self, Key):
+        self.pending.append(("delete", Key))
+        if len(self.pending) >= self.flush_amount:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        self.table._wait()
+        # One oversized item fails the whole BatchWriteItem call
+        pending, self.pending = self.pending, []
+        for action, value in pending:
+            if action == "put":
+                check_item_size(value, "BatchWriteItem")
+        with self.table.lock:
+            self.table.batch_requests = getattr(self.table, "batch_requests", 0) + 1
+            for action, value in pending:
+                if action == "put":
+                    self.table.items[value["id"]] = value
+                else:
+                    self.table.items.pop(value["id"], None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._flush()
+        return False
+
+
+class FakeBonzoAPI:
+    # Local aiohttp stand-in for the Bonzo v3 prospect endpoints with
+    # injectable latency and a per-route hit counter.
+    def __init__(self, latency=0.0, messages=20, notes=3, etags=True, content=True, notes_status=200, route_latency=None):
+        self.latency = latency
+        self.messages = messages
+        self.notes = notes
+        self.etags = etags
+        # content=False sends messages with empty bodies
+        self.content = content
+        self.notes_status = notes_status
+        # Overrides latency for "communication", "prospect", "notes" or "sms"
+        self.route_latency = route_latency or {}
+        # Bump to change prospect and notes payloads (and their ETags)
+        self.version = 0
+        self.hits = {}
+        self.sent = []
+
+    async def _delay(self, route, count=True):
+        if count:
+            self.hits[route] = self.hits.get(route, 0) + 1
+        latency = self.route_latency.get(route, self.latency)
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def communication(self, request):
+        # Oldest first, with an after_id cursor and Laravel-style page links;
+        # communication_items counts how many messages were sent back
+        await self._delay("communication")
+        after_id = int(request.query.get("after_id", -1))
+        per_page = int(request.query.get("per_page", self.messages or 1))
+        page = int(request.query.get("page", 1))
+        ids = range(after_id + 1, self.messages)
+        page_ids = ids[(page - 1) * per_page:page * per_page]
+        data = [
+            {
+                "id": i,
+                "direction": "incoming" if i % 2 == 0 else "outgoing",
+                "content": f"message {i} from prospect {request.match_info['id']}" if self.content else ""
+            }
+            for i in page_ids
+        ]
+        self.hits["communication_items"] = self.hits.get("communication_items", 0) + len(data)
+        links = {"next": None}
+        if page * per_page < len(ids):
+            links["next"] = str(request.url.update_query(page=page + 1))
+        return web.json_response({"data": data, "links": links})
+
+    def _conditional(self, route, request, body):
+        # ETag/Last-Modified like an API that supports revalidation; a 304
+        # is counted under "<route>_304" instead of as a full fetch
+        if not self.etags:
+            self.hits[route] = self.hits.get(route, 0) + 1
+            return web.json_response(body)
+        etag = f'"{zlib.crc32(json.dumps(body, sort_keys=True).encode()):08x}"'
+        headers = {"ETag": etag, "Last-Modified": "Thu, 01 Oct 2026 00:00:00 GMT"}
+        if request.headers.get("If-None-Match") == etag:
+            self.hits[f"{route}_304"] = self.hits.get(f"{route}_304", 0) + 1
+            return web.Response(status=304, headers=headers)
+        self.hits[route] = self.hits.get(route, 0) + 1
+        return web.json_response(body, headers=headers)
+
+    async def prospect(self, request):
+        await self._delay("prospect", count=False)
+        body = {"data": {"id": request.match_info["id"], "first_name": "Jane", "last_name": "Doe", "version": self.version}}
+        return self._conditional("prospect", request, body)
+
+    async def notes_handler(self, request):
+        await self._delay("notes", count=False)
+        if self.notes_status != 200:
+            return web.json_response({"error": "unavailable"}, status=self.notes_status)
+        body = {"data": [{"content": f"note {i} v{self.version}"} for i in range(self.notes)]}
+        return self._conditional("notes", request, body)
+
+    async def sms(self, request):
+        await self._delay("sms")
+        self.sent.append((request.match_info["id"], await request.json()))
+        return web.json_response({"data": {"status": "queued"}})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/prospects/{id}/communication", self.communication)
+        app.router.add_get("/prospects/{id}/notes", self.notes_handler)
+        app.router.add_get("/prospects/{id}", self.prospect)
+        app.router.add_post("/prospects/{id}/sms", self.sms)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class FakeOpenAI:
+    # Local stand-in for the OpenAI chat completions API. Structured-output
+    # requests (response_format set) get a Sentiment/Response-shaped reply,
+    # everything else gets an empty schema extraction.
+    def __init__(self, first_token_latency=0.3, chunk_latency=0.01, reply_words=40, prompt_tokens=None, rate_limited=0):
+        self.first_token_latency = first_token_latency
+        self.rate_limited = rate_limited
+        self.chunk_latency = chunk_latency
+        self.reply_words = reply_words
+        self.prompt_tokens = prompt_tokens
+        self.hits = {}
+        self.requests = []
+
+    def content_for(self, body):
+        if body.get("response_format"):
+            reply = " ".join(f"word{i}" for i in range(self.reply_words))
+            return json.dumps({"response": reply, "conversation_status": "continue_conversation"})
+        return json.dumps({"extracted_fields": {}})
+
+    def usage_for(self, body, content):
+        prompt_tokens = self.prompt_tokens or len(json.dumps(body.get("messages", []))) // 4
+        completion_tokens = max(1, len(content) // 4)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0}
+        }
+
+    def chunks_for(self, content):
+        return [content[i:i + 8] for i in range(0, len(content), 8)]
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        model = body.get("model", "gpt-4o")
+        self.hits[model] = self.hits.get(model, 0) + 1
+        self.requests.append(body)
+
+        # Answer the first `rate_limited` requests with a 429
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after-ms": "50", "x-ratelimit-remaining-requests": "0"}
+            )
+
+        content = self.content_for(body)
+        usage = self.usage_for(body, content)
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(self.first_token_latency + self.chunk_latency * len(self.chunks_for(content)))
+            return web.json_response({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content, "refusal": None},
+                    "finish_reason": "stop",
+                    "logprobs": None
+                }],
+                "usage": usage
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}]
+            }
+
+        async def send(payload):
+            await response.write(f"data: {json.dumps(payload)}\n\n".encode())
+
+        await asyncio.sleep(self.first_token_latency)
+        await send(chunk({"role": "assistant", "content": ""}))
+        for piece in self.chunks_for(content):
+            await send(chunk({"content": piece}))
+            await asyncio.sleep(self.chunk_latency)
+        await send(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model, "choices": [], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self):
+        await self.runner.cleanup()
@@ -0,0 +1,43 @@
+import os
+import asyncio
+import contextlib
+
+from benchmarks.fakes import FakeDynamoTable
+
+API_KEY = "benchmark-key"
+
+
+def load_app(openai_base_url, tables=None, dynamo_latency=0.0):
+    # Import app.py wired to local stand-ins: OpenAI at openai_base_url and
+    # in-memory DynamoDB tables instead of boto3. Tables are created on first
+    # use, the same way the app resolves them lazily.
+    os.environ["OPENAI_BASE_URL"] = openai_base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("AWS_REGION_NAME", "us-east-1")
+    os.environ["API_KEY"] = API_KEY
+
+    tables = {} if tables is None else tables
+
+    import repository
+    repository.get_dynamo_table = lambda name: tables.setdefault(name, FakeDynamoTable(latency=dynamo_latency))
+
+    import app
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve(quart_app, host="127.0.0.1", port=8765):
+    from hypercorn.config import Config
+    from hypercorn.asyncio import serve as hypercorn_serve
+
+    config = Config()
+    config.bind = [f"{host}:{port}"]
+    config.accesslog = None
+    shutdown = asyncio.Event()
+    server = asyncio.create_task(hypercorn_serve(quart_app, config, shutdown_trigger=shutdown.wait))
+    await asyncio.sleep(0.5)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        shutdown.set()
+        await server
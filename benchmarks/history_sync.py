@@ -0,0 +1,71 @@
+"""Bonzo communication fetches with and without the per-prospect history log.
+
+Grows one conversation on the local Bonzo stand-in step by step, the way a
+long-running prospect does, and fetches its history when the next couple of
+messages arrive. Prints, per conversation length, how many messages Bonzo
+sent back and how long the fetch and parse took: a full download every time
+versus a delta sync against the stored log (kept on a local DynamoDB
+stand-in, with and without the in-container copy).
+
+    python -m benchmarks.history_sync --start 50 --steps 10 --grow 200
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakes import FakeBonzoAPI, FakeDynamoTable
+from repository.history import HistoryLogStore
+from services import bonzo
+from services.history import HistorySync
+
+
+async def fetch(api, session, headers, history):
+    api.hits = {}
+    start = time.perf_counter()
+    message_history = await bonzo.fetch_communication_history(session, "p1", headers, history)
+    elapsed = time.perf_counter() - start
+    return len(message_history), api.hits.get("communication_items", 0), elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--grow", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    api = FakeBonzoAPI(latency=args.latency, messages=args.start)
+    bonzo.BONZO_API_BASE = await api.start()
+    session = bonzo.create_session()
+    headers = bonzo.bonzo_headers("token", "agent@example.com")
+
+    store = HistoryLogStore(table=FakeDynamoTable(latency=0.002))
+    warm = HistorySync(store)
+    # A zero-size in-container cache reads the log back from the table every time
+    cold = HistorySync(HistoryLogStore(table=store.table), maxsize=0)
+    try:
+        await fetch(api, session, headers, warm)
+        print(f"{'messages':>8}  {'full: items':>11} {'ms':>7}  {'delta: items':>12} {'ms':>7}  {'table: items':>12} {'ms':>7}")
+        for _ in range(args.steps):
+            # The conversation grows, then a new inbound message triggers a send
+            api.messages += args.grow
+            await fetch(api, session, headers, warm)
+            api.messages += 2
+            count, full_items, full_elapsed = await fetch(api, session, headers, None)
+            _, delta_items, delta_elapsed = await fetch(api, session, headers, warm)
+            api.messages += 2
+            _, table_items, table_elapsed = await fetch(api, session, headers, cold)
+            print(
+                f"{count:8d}  {full_items:11d} {full_elapsed * 1000:7.2f}  "
+                f"{delta_items:12d} {delta_elapsed * 1000:7.2f}  {table_items:12d} {table_elapsed * 1000:7.2f}"
+            )
+        print(f"sync stats: {warm.stats()}")
+    finally:
+        await session.close()
+        store.close()
+        await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
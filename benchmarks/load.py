@@ -0,0 +1,221 @@
+"""Throughput and tail latency of the main endpoints against local stand-ins.
+
+Serves the app with hypercorn, wired to the fake OpenAI server, the fake
+Bonzo API and in-memory DynamoDB tables (see benchmarks/fakes.py), and drives
+each scenario at a fixed concurrency: upload_context, get_context,
+message_teli_data and send_ai_message. Every request carries a fresh id or
+message so the response cache and single-flight dedup don't answer it.
+
+Per scenario it reports p50/p95/p99 latency, requests per second, status
+codes and event-loop lag (how late a 10ms sleep wakes up while under load;
+the load generator shares the loop, so this is an upper bound). Results are
+written as JSON so runs on different commits can be compared:
+
+    python -m benchmarks.load --concurrency 32 --requests 500 --output before.json
+    python -m benchmarks.load --concurrency 32 --requests 500 --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import time
+
+import aiohttp
+
+from benchmarks.fakes import FakeBonzoAPI, FakeOpenAI
+from benchmarks.harness import API_KEY, load_app, serve
+from services import bonzo
+
+SCENARIOS = ("upload_context", "get_context", "message_teli_data", "send_ai_message")
+
+# Contexts get_context and message_teli_data read from
+SEED_CONTEXTS = 50
+
+LOOP_LAG_INTERVAL = 0.01
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else None,
+        "mean": sum(values) / len(values) if values else None
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def context_body(id, chunks):
+    return {
+        "id": id,
+        "context": [f"Chunk {i} of {id}: our rates start at {i % 7 + 3}% and closing takes {i % 5 + 2} weeks." for i in range(chunks)],
+        "goal": "Book a call",
+        "schema_context": [{"name": "budget", "type": "string"}]
+    }
+
+def build_request(scenario, n, args):
+    # (method, path, json body) for the n-th request of a scenario
+    if scenario == "upload_context":
+        return "POST", "/upload_context", context_body(f"load-upload-{n}", args.context_chunks)
+    if scenario == "get_context":
+        return "GET", f"/get_context/load-seed-{n % SEED_CONTEXTS}", None
+    if scenario == "message_teli_data":
+        return "POST", "/message-teli-data", {
+            "id": f"load-seed-{n % SEED_CONTEXTS}",
+            "message_history": [{"role": "user", "message": f"What are your rates for loan {n}?"}],
+            "scope": "reply_only"
+        }
+    return "POST", "/send_ai_message", {
+        "prospect_id": f"load-{n}",
+        "prompt_id": 1,
+        "on_behalf_of": "load@example.com",
+        "auth_token": "token"
+    }
+
+
+async def seed_contexts(session, base_url, args):
+    headers = {"X-API-Key": API_KEY}
+    for n in range(SEED_CONTEXTS):
+        body = context_body(f"load-seed-{n}", args.context_chunks)
+        async with session.post(f"{base_url}/upload_context", json=body, headers=headers) as response:
+            response.raise_for_status()
+
+async def sample_loop_lag(lags):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lags.append((time.perf_counter() - start - LOOP_LAG_INTERVAL) * 1000)
+
+async def run_scenario(session, base_url, scenario, args):
+    headers = {"X-API-Key": API_KEY}
+    latencies = []
+    statuses = {}
+    errors = 0
+    counter = iter(range(args.warmup + args.requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            method, path, body = build_request(scenario, n, args)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, f"{base_url}{path}", json=body, headers=headers) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError:
+                status = "error"
+            elapsed = (time.perf_counter() - start) * 1000
+            if n < args.warmup:
+                continue
+            latencies.append(elapsed)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == "error" or status >= 400:
+                errors += 1
+
+    lags = []
+    sampler = asyncio.create_task(sample_loop_lag(lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    await asyncio.gather(sampler, return_exceptions=True)
+
+    # Warmup requests are part of the wall time; count them out roughly
+    measured = elapsed * args.requests / (args.warmup + args.requests)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status": statuses,
+        "rps": len(latencies) / measured if measured else None,
+        "latency_ms": summarize(latencies),
+        "loop_lag_ms": summarize(lags)
+    }
+
+def print_result(scenario, result, baseline=None):
+    latency = result["latency_ms"]
+    line = (
+        f"{scenario:>18}: {result['rps']:8.1f} rps  p50={latency['p50']:7.1f}ms  p95={latency['p95']:7.1f}ms  "
+        f"p99={latency['p99']:7.1f}ms  lag p99={result['loop_lag_ms']['p99'] or 0:6.1f}ms  errors={result['errors']}"
+    )
+    if baseline:
+        before = baseline["latency_ms"]
+        line += f"  | vs baseline: rps {result['rps'] / baseline['rps'] - 1:+.0%}  p95 {latency['p95'] / before['p95'] - 1:+.0%}  p99 {latency['p99'] / before['p99'] - 1:+.0%}"
+    print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--context-chunks", type=int, default=40)
+    parser.add_argument("--openai-latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--chunk-latency", type=float, default=0.0)
+    parser.add_argument("--reply-words", type=int, default=40)
+    parser.add_argument("--prompt-tokens", type=int, default=None, help="reported prompt tokens (default: estimated from the request)")
+    parser.add_argument("--bonzo-latency", type=float, default=0.05)
+    parser.add_argument("--history", type=int, default=20, help="messages per prospect in the fake Bonzo API")
+    parser.add_argument("--dynamo-latency", type=float, default=0.005)
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    scenarios = [scenario for scenario in args.scenarios.split(",") if scenario]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+
+    fake_openai = FakeOpenAI(
+        first_token_latency=args.openai_latency,
+        chunk_latency=args.chunk_latency,
+        reply_words=args.reply_words,
+        prompt_tokens=args.prompt_tokens
+    )
+    fake_bonzo = FakeBonzoAPI(latency=args.bonzo_latency, messages=args.history)
+    app = load_app(await fake_openai.start(), dynamo_latency=args.dynamo_latency)
+    bonzo.BONZO_API_BASE = await fake_bonzo.start()
+
+    results = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with serve(app.quart_app) as base_url, aiohttp.ClientSession(connector=connector) as session:
+            await seed_contexts(session, base_url, args)
+            for scenario in scenarios:
+                results[scenario] = await run_scenario(session, base_url, scenario, args)
+                print_result(scenario, results[scenario], baseline.get(scenario))
+    finally:
+        await fake_openai.stop()
+        await fake_bonzo.stop()
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "config": vars(args),
+            "scenarios": results
+        }, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
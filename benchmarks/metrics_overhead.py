@@ -0,0 +1,73 @@
+"""Per-span cost of the timing layer in services/metrics.py.
+
+Times an empty span, a timed() await and a begin/end request pair, both inside
+a request context and in the background path. Exits non-zero when any of
+them costs more than METRICS_OVERHEAD_BUDGET_US microseconds.
+
+    python -m benchmarks.metrics_overhead --iterations 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from services.metrics import METRICS_OVERHEAD_BUDGET_US, Metrics, timed
+
+
+async def noop():
+    return None
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def per_await_us(make, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await make()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--budget-us", type=float, default=METRICS_OVERHEAD_BUDGET_US)
+    args = parser.parse_args()
+
+    metrics = Metrics()
+
+    def empty_span():
+        with metrics.span("bench.span"):
+            pass
+
+    def request_pair():
+        metrics.begin_request("bench")
+        metrics.end_request(200)
+
+    baseline = await per_await_us(noop, args.iterations)
+    results = {"background span": per_call_us(empty_span, args.iterations)}
+
+    # Request-scoped spans also append to the per-request timings list
+    metrics.begin_request("bench")
+    results["request span"] = per_call_us(empty_span, args.iterations)
+    results["timed() await"] = await per_await_us(lambda: timed("bench.timed", noop()), args.iterations) - baseline
+    results["begin/end request"] = per_call_us(request_pair, args.iterations)
+
+    over = False
+    for label, cost in results.items():
+        flag = "OK" if cost <= args.budget_us else "OVER"
+        over = over or cost > args.budget_us
+        print(f"{label:>18}: {cost:6.2f}us  (budget {args.budget_us:.1f}us) {flag}")
+
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f"{'render /metrics':>18}: {(time.perf_counter() - start) * 1000:6.2f}ms for {len(body.splitlines())} lines")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
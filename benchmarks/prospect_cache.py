@@ -0,0 +1,69 @@
+"""Upstream Bonzo hits with and without the prospect/notes cache.
+
+Sends repeated fetch_prospect_context calls for a handful of prospects to the
+local Bonzo stand-in and counts what reaches it: full fetches, 304
+revalidations and time spent. Runs without a cache, with the in-process
+backend, with the shared DynamoDB backend (on a local stand-in) and with a
+zero TTL so every call revalidates by ETag. Finally the stand-in's data is
+changed to show revalidation picking up the new version.
+
+    python -m benchmarks.prospect_cache --prospects 20 --sends 10 --latency 0.02
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakes import FakeBonzoAPI, FakeDynamoTable
+from repository.prospect_cache import ProspectCacheStore
+from services import bonzo
+from services.prospect_cache import MemoryCacheBackend, ProspectCache
+
+
+async def run(label, api, cache, prospects, sends):
+    api.hits = {}
+    session = bonzo.create_session()
+    headers = bonzo.bonzo_headers("token", "agent@example.com")
+    start = time.perf_counter()
+    try:
+        for _ in range(sends):
+            await asyncio.gather(*(
+                bonzo.fetch_prospect_context(session, f"p{i}", headers, cache) for i in range(prospects)
+            ))
+    finally:
+        await session.close()
+    elapsed = time.perf_counter() - start
+
+    hits = api.hits
+    print(
+        f"{label:>14}: prospect {hits.get('prospect', 0):4d} full {hits.get('prospect_304', 0):4d} 304  "
+        f"notes {hits.get('notes', 0):4d} full {hits.get('notes_304', 0):4d} 304  {elapsed:6.2f}s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prospects", type=int, default=20)
+    parser.add_argument("--sends", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    api = FakeBonzoAPI(latency=args.latency, messages=10)
+    bonzo.BONZO_API_BASE = await api.start()
+    try:
+        await run("no cache", api, None, args.prospects, args.sends)
+        await run("memory", api, ProspectCache(MemoryCacheBackend()), args.prospects, args.sends)
+
+        store = ProspectCacheStore(table=FakeDynamoTable(latency=0.002))
+        await run("dynamo", api, ProspectCache(store), args.prospects, args.sends)
+        store.close()
+
+        revalidating = ProspectCache(MemoryCacheBackend(), ttl=0)
+        await run("revalidate", api, revalidating, args.prospects, args.sends)
+        api.version += 1
+        await run("after change", api, revalidating, args.prospects, 1)
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""Top-k context retrieval latency and prompt-size reduction.
+
+Builds a hashing-embedder index over synthetic context chunks, then times
+top-k retrieval for a set of queries and compares the packed prompt size
+with sending every chunk. No network is used.
+
+    python -m benchmarks.retrieval --chunks 500 --top-k 8
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from services.embeddings import HashingEmbedder, decode_index, encode_index, top_k
+from services.packing import pack_context
+from services.tokens import count_tokens
+
+TOPICS = ["rates", "fees", "closing costs", "credit score", "refinance", "down payment", "escrow", "appraisal", "insurance", "office hours"]
+
+
+def synthetic_chunks(count, rng):
+    return [
+        f"{topic.title()}: " + " ".join(rng.choice(["we", "offer", "the", "loan", "your", "home", topic, "terms", "apply", "today"]) for _ in range(60))
+        for topic in (TOPICS[i % len(TOPICS)] for i in range(count))
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--budget", type=int, default=6000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    embedder = HashingEmbedder()
+    chunks = synthetic_chunks(args.chunks, rng)
+    token_counts = [count_tokens(chunk) for chunk in chunks]
+
+    start = time.perf_counter()
+    blob = encode_index(await embedder.embed(chunks))
+    build_ms = (time.perf_counter() - start) * 1000
+    matrix = decode_index(blob, embedder.dim)
+
+    timings, packed_tokens = [], []
+    for _ in range(args.queries):
+        query = f"what about your {rng.choice(TOPICS)}?"
+        start = time.perf_counter()
+        vector = await embedder.embed([query])
+        indices, scores = top_k(matrix, vector[0], args.top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        candidates = sorted(indices.tolist())
+        _, used = pack_context([chunks[i] for i in candidates], [token_counts[i] for i in candidates], args.budget)
+        packed_tokens.append(used)
+
+    timings.sort()
+    print(f"index: {args.chunks} chunks, {len(blob)} bytes, built in {build_ms:.1f}ms")
+    print(f"retrieval: p50={statistics.median(timings):.3f}ms p99={timings[int(len(timings) * 0.99) - 1]:.3f}ms")
+    print(f"context tokens: all chunks={sum(token_counts)}  retrieved={statistics.mean(packed_tokens):.0f} "
+          f"({1 - statistics.mean(packed_tokens) / sum(token_counts):.1%} smaller)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Time-to-first-byte of /message-teli-data, buffered vs streamed (SSE).
+
+Serves the app with hypercorn against a local fake OpenAI server and measures
+when the first body byte and the complete body arrive. Every request asks a
+different question so single-flight dedup never replays an earlier reply.
+
+    python -m benchmarks.streaming_ttfb --iterations 10 --first-token 0.3
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import aiohttp
+
+from benchmarks.fakes import FakeOpenAI
+from benchmarks.harness import API_KEY, load_app, serve
+
+
+async def measure(session, url, body, headers):
+    start = time.perf_counter()
+    first_byte = None
+    async with session.post(url, json=body, headers=headers) as response:
+        async for _ in response.content.iter_any():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+    return first_byte, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--chunk-latency", type=float, default=0.01)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    fake = FakeOpenAI(first_token_latency=args.first_token, chunk_latency=args.chunk_latency)
+    app = load_app(await fake.start())
+    headers = {"X-API-Key": API_KEY}
+
+    try:
+        async with serve(app.quart_app) as base_url, aiohttp.ClientSession() as session:
+            async with session.post(f"{base_url}/upload_context", json={"id": "bench", "context": ["Rates start at 6%."]}, headers=headers) as response:
+                response.raise_for_status()
+
+            for label, extra in (("buffered", {}), ("streamed", {"stream": True})):
+                ttfb, total = [], []
+                for n in range(args.iterations):
+                    body = {
+                        "id": "bench",
+                        "message_history": [{"role": "user", "message": f"what are your rates for a {label} loan {n}?"}],
+                        "scope": "reply_only",
+                        **extra
+                    }
+                    first, done = await measure(session, f"{base_url}/message-teli-data", body, headers)
+                    ttfb.append(first * 1000)
+                    total.append(done * 1000)
+                print(f"{label:>9}: ttfb p50={statistics.median(ttfb):7.1f}ms  total p50={statistics.median(total):7.1f}ms")
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,22 +1,28 @@
 import boto3
 import os
 import logging
+from functools import lru_cache
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 load_dotenv()
 
-session = boto3.Session(
-    aws_access_key_id=os.environ.get("DYNAMODB_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.environ.get("DYNAMODB_SECRET_ACCESS_KEY"),
-    region_name=os.environ.get("AWS_REGION_NAME")
-)
+# Every table the app uses; created ahead of time with `python -m repository provision`
+TABLE_NAMES = ("message_context_bonzo", "prompt_registry_bonzo", "usage_ledger_bonzo", "prospect_cache_bonzo", "prospect_history_bonzo", "jobs_bonzo")
 
-boto_client = session.resource('dynamodb')
+@lru_cache(maxsize=1)
+def get_boto_resource():
+    # Built on first use so importing the app does no AWS work
+    session = boto3.Session(
+        aws_access_key_id=os.environ.get("DYNAMODB_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.environ.get("DYNAMODB_SECRET_ACCESS_KEY"),
+        region_name=os.environ.get("AWS_REGION_NAME")
+    )
+    return session.resource('dynamodb')
 
 def create_dynamo_table(table_name):
     try:
-        table = boto_client.create_table(
+        table = get_boto_resource().create_table(
             TableName=table_name,
             KeySchema=[
                 {'AttributeName': 'id', 'KeyType': 'HASH'},  # Partition key
@@ -33,10 +39,11 @@ def create_dynamo_table(table_name):
         logging.error(f"Failed to create table {table_name}: {e}")
         raise
 
-def get_dynamo_table(table_name):
+def ensure_dynamo_table(table_name):
+    # Provisioning step: never called on the request path
     try:
         # Try to get the table
-        table = boto_client.Table(table_name)
+        table = get_boto_resource().Table(table_name)
         table.load()  # Check if the table exists
         logging.info(f"Connected to DynamoDB table: {table_name}")
         return table
@@ -48,9 +55,13 @@ def get_dynamo_table(table_name):
             logging.error(f"Failed to connect to table {table_name}: {e}")
             raise
 
+def get_dynamo_table(table_name):
+    # No round trip here; a missing table surfaces as ResourceNotFoundException on first use
+    return get_boto_resource().Table(table_name)
+
 def delete_dynamo_table(table_name):
     try:
-        table = boto_client.Table(table_name)
+        table = get_boto_resource().Table(table_name)
         table.delete()
         logging.info(f"Table {table_name} deleted successfully.")
     except ClientError as e:
@@ -0,0 +1,25 @@
+"""DynamoDB table provisioning, kept out of the app's startup path.
+
+    python -m repository provision          # create any missing tables
+    python -m repository delete <table>     # drop one table
+"""
+import sys
+import logging
+from repository import TABLE_NAMES, delete_dynamo_table, ensure_dynamo_table
+
+
+def main(argv):
+    logging.basicConfig(level=logging.INFO)
+    if argv[:1] == ["provision"]:
+        for table_name in argv[1:] or TABLE_NAMES:
+            ensure_dynamo_table(table_name)
+    elif argv[:1] == ["delete"] and len(argv) == 2:
+        delete_dynamo_table(argv[1])
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
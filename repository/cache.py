@@ -0,0 +1,77 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.data[key] = (value, expires_at)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def keys(self):
+        # Snapshot of the stored keys, including ones not yet found expired
+        with self.lock:
+            return list(self.data)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __contains__(self, key):
+        # Membership check that leaves the hit/miss counters alone
+        with self.lock:
+            entry = self.data.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def __len__(self):
+        return len(self.data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -1,30 +1,163 @@
+import os
+import uuid
+import asyncio
 import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from quart import jsonify
 from repository import get_dynamo_table
+from repository.cache import TTLCache
+from repository.write_behind import WriteBehindBuffer
 from botocore.exceptions import ClientError
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# boto3 is synchronous, so every DynamoDB call runs on this bounded pool
+# instead of on the event loop.
+DYNAMO_MAX_WORKERS = int(os.environ.get("DYNAMO_MAX_WORKERS", "16"))
+
+# Conversation summaries live in the same table under this id prefix
+SUMMARY_PREFIX = "summary#"
+
+# Embedding indexes are kept in sidecar rows under this prefix, split into
+# parts that keep each row well under DynamoDB's 400 KB item limit
+INDEX_PREFIX = "index#"
+INDEX_PART_BYTES = int(os.environ.get("INDEX_PART_BYTES", "350000"))
+
+# Context ids may not start with these, or they would collide with the rows above
+RESERVED_PREFIXES = (SUMMARY_PREFIX, INDEX_PREFIX)
+
+# Read-through cache in front of get(); contexts rarely change between turns.
+CONTEXT_CACHE_MAXSIZE = int(os.environ.get("CONTEXT_CACHE_MAXSIZE", "1024"))
+CONTEXT_CACHE_TTL = float(os.environ.get("CONTEXT_CACHE_TTL", "300"))
+
+# Full-table reads scan this many segments in parallel, with at most this many
+# pages buffered per segment; 0 page size leaves DynamoDB's 1 MB pages
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "4"))
+SCAN_PAGE_SIZE = int(os.environ.get("SCAN_PAGE_SIZE", "0"))
+SCAN_BUFFERED_PAGES = int(os.environ.get("SCAN_BUFFERED_PAGES", "2"))
+
+# Attributes a full-table read may project; the embedding index is never exported
+CONTEXT_EXPORT_FIELDS = ("context", "goal", "tone", "schema_context", "context_tokens", "token_budget")
+
+# Bulk writes are split across this many concurrent batch writers of 25 items each
+BATCH_WRITE_PARALLELISM = int(os.environ.get("BATCH_WRITE_PARALLELISM", "4"))
+
+def context_item(id, context, goal, tone, schema_context, context_tokens=None, token_budget=None, context_index=None):
+    # Save both context and schema_context in DynamoDB
+    item = {
+        "id": id,
+        "context": context,
+        "goal": goal,
+        "tone": tone,
+        "schema_context": schema_context,
+        "context_tokens": context_tokens or [],
+        "token_budget": token_budget
+    }
+    # Embedding index over the chunks as packed float16 bytes; the store moves
+    # it to sidecar rows on write (see split_index)
+    if context_index:
+        item["context_index"] = context_index["vectors"]
+        item["index_embedder"] = context_index["embedder"]
+        item["index_dim"] = context_index["dim"]
+    return item
+
+def is_reserved_id(id):
+    return isinstance(id, str) and id.startswith(RESERVED_PREFIXES)
+
+def index_part_id(id, n):
+    return f"{INDEX_PREFIX}{id}#{n}"
+
+def split_index(item):
+    # Moves an inline context_index onto part rows; the context item keeps the
+    # part count and a version the parts must match. Parts beyond index_parts
+    # left by an older, larger index are ignored and overwritten later.
+    blob = item.get("context_index")
+    if blob is None:
+        return item, []
+    blob = bytes(blob)
+    version = uuid.uuid4().hex
+    parts = [
+        {"id": index_part_id(item["id"], n), "version": version, "vectors": blob[start:start + INDEX_PART_BYTES]}
+        for n, start in enumerate(range(0, len(blob), INDEX_PART_BYTES))
+    ]
+    item = {key: value for key, value in item.items() if key != "context_index"}
+    item["index_parts"] = len(parts)
+    item["index_version"] = version
+    return item, parts
+
+def item_to_context(item):
+    # Return both context and schema_context (align with lodasoft)
+    return {
+        "context": item.get("context", []),
+        "goal": item.get("goal", ""),
+        "tone": item.get("tone", ""),
+        "schema_context": item.get("schema_context", []),
+        "context_tokens": [int(count) for count in item.get("context_tokens", [])],
+        "token_budget": int(item["token_budget"]) if item.get("token_budget") is not None else None,
+        "context_index": bytes(item["context_index"]) if item.get("context_index") is not None else None,
+        "index_embedder": item.get("index_embedder"),
+        "index_dim": int(item.get("index_dim", 0))
+    }
+
 class MessageContextBonzo:
-    def __init__(self):
+    def __init__(self, table=None, max_workers=DYNAMO_MAX_WORKERS):
         self.table_name = "message_context_bonzo"
-        self.table = get_dynamo_table(self.table_name)
+        self._table = table
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dynamo")
+        self.cache = TTLCache(maxsize=CONTEXT_CACHE_MAXSIZE, ttl=CONTEXT_CACHE_TTL)
+        # Bumped on every invalidation; a fill only caches if none happened meanwhile
+        self.generation = 0
+        # Optional write-behind for bulk uploads; reads see pending writes
+        self.write_behind = WriteBehindBuffer(self.batch_write)
+
+    @property
+    def table(self):
+        # Resolved on first use so constructing the store does no AWS work
+        if self._table is None:
+            self._table = get_dynamo_table(self.table_name)
+        return self._table
+
+    async def connect(self):
+        # Builds the boto3 resource off the event loop ahead of the first request
+        await self._run(lambda: self.table)
 
-    def get(self, id):
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def _invalidate(self, id):
+        self.cache.invalidate(id)
+        self.generation += 1
+
+    async def get(self, id):
+        pending, item = self.write_behind.lookup(id)
+        if pending:
+            return item_to_context(item) if item is not None else None
+
+        cached = self.cache.get(id)
+        if cached is not None:
+            return cached
+
+        generation = self.generation
         try:
-            response = self.table.get_item(Key={"id": id})
+            # Strongly consistent, so a fill right after a write can't cache the old replica
+            response = await self._run(self.table.get_item, Key={"id": id}, ConsistentRead=True)
             if "Item" in response:
                 item = response["Item"]
+                if item.get("index_parts"):
+                    item = dict(item, context_index=await self._load_index(id, item))
                 logging.info(f"Message context for id {id} retrieved successfully.")
-                # Return both context and schema_context (align with lodasoft)
-                return {
-                    "context": item.get("context", []),
-                    "goal": item.get("goal", ""),
-                    "tone": item.get("tone", ""),
-                    "schema_context": item.get("schema_context", [])
-                }
+                context = item_to_context(item)
+                # A write that landed while we were reading may be newer than what we read
+                if generation == self.generation:
+                    self.cache.set(id, context)
+                return context
             else:
                 logging.warning(f"No message context found for id {id}.")
                 return None
@@ -32,48 +165,214 @@ class MessageContextBonzo:
             logging.error(f"Failed to retrieve message context for id {id}: {e}")
             raise
 
-    def get_all(self):
+    async def _load_index(self, id, item):
+        # None (retrieval falls back to keyword scoring) unless every part of
+        # the item's index version is present and the size adds up
+        version = item.get("index_version")
+        responses = await asyncio.gather(*(
+            self._run(self.table.get_item, Key={"id": index_part_id(id, n)}, ConsistentRead=True)
+            for n in range(int(item["index_parts"]))
+        ))
+        parts = [response.get("Item") for response in responses]
+        if any(part is None or part.get("version") != version for part in parts):
+            logging.warning(f"Embedding index for id {id} is incomplete or being rewritten; skipping it.")
+            return None
+        blob = b"".join(bytes(part["vectors"]) for part in parts)
+        if len(blob) != len(item.get("context", [])) * int(item.get("index_dim", 0)) * 2:
+            logging.warning(f"Embedding index for id {id} doesn't match its context; skipping it.")
+            return None
+        return blob
+
+    async def _delete_index_parts(self, id, stop, start=0):
+        await asyncio.gather(*(self._run(self.table.delete_item, Key={"id": index_part_id(id, n)}) for n in range(start, stop)))
+
+    async def _index_parts(self, ids):
+        # Part counts of the stored items, for cleaning up their sidecar rows
+        responses = await asyncio.gather(*(
+            self._run(self.table.get_item, Key={"id": id}, ProjectionExpression="index_parts")
+            for id in ids
+        ))
+        return {id: int(response.get("Item", {}).get("index_parts", 0)) for id, response in zip(ids, responses)}
+
+    async def _scan_segment(self, pages, segment, total_segments, kwargs):
+        kwargs = dict(kwargs, Segment=segment, TotalSegments=total_segments)
         try:
-            response = self.table.scan()
-            items = response.get("Items", [])
-            contexts = {
-                item["id"]: {
+            while True:
+                response = await self._run(self.table.scan, **kwargs)
+                # Blocks when the consumer falls behind, so memory stays bounded
+                await pages.put(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except Exception as e:
+            # Hand the failure to the consumer instead of leaving it waiting
+            logging.error(f"Failed to scan segment {segment} of message contexts: {e}")
+            await pages.put(e)
+            return
+        await pages.put(None)
+
+    async def iter_contexts(self, attributes=CONTEXT_EXPORT_FIELDS, segments=SCAN_SEGMENTS, page_size=SCAN_PAGE_SIZE):
+        # Yields one item per context id, projected to id plus attributes,
+        # following LastEvaluatedKey across parallel Segment/TotalSegments scans
+        names = {f"#a{n}": name for n, name in enumerate(("id", *attributes))}
+        kwargs = {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+        if page_size:
+            kwargs["Limit"] = page_size
+
+        pages = asyncio.Queue(maxsize=segments * SCAN_BUFFERED_PAGES)
+        tasks = [asyncio.create_task(self._scan_segment(pages, segment, segments, kwargs)) for segment in range(segments)]
+        try:
+            remaining = segments
+            while remaining:
+                page = await pages.get()
+                if page is None:
+                    remaining -= 1
+                    continue
+                if isinstance(page, Exception):
+                    raise page
+                for item in page:
+                    if not is_reserved_id(item["id"]):
+                        yield item
+        finally:
+            # Stop the remaining segment scans if the consumer goes away early
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_all(self):
+        try:
+            contexts = {}
+            async for item in self.iter_contexts(("context", "goal", "tone", "schema_context")):
+                contexts[item["id"]] = {
                     "context": item.get("context", []),
                     "goal": item.get("goal", ""),
                     "tone": item.get("tone", ""),
                     "schema_context": item.get("schema_context", [])
-                } for item in items
-            }
+                }
             logging.info("All message contexts retrieved successfully.")
             return contexts
         except ClientError as e:
             logging.error(f"Failed to retrieve all message contexts: {e}")
             raise
 
-    def delete(self, id):
+    async def delete(self, id):
+        # Invalidated before and after the write; reads overlapping it don't
+        # cache what they read (see get)
+        self._invalidate(id)
+        self.write_behind.discard(id)
         try:
-            self.table.delete_item(
+            response = await self._run(
+                self.table.delete_item,
                 Key={"id": id},
                 ReturnValues="ALL_OLD"
             )
+            self._invalidate(id)
+            await self._delete_index_parts(id, int(response.get("Attributes", {}).get("index_parts", 0)))
             logging.info(f"Message context for id {id} deleted successfully.")
         except ClientError as e:
             logging.error(f"Failed to delete message context for id {id}: {e}")
             raise
 
-    async def update_message_context(self, id, context, goal, tone, schema_context):
+    async def update_message_context(self, id, context, goal, tone, schema_context, context_tokens=None, token_budget=None, context_index=None):
+        self._invalidate(id)
+        self.write_behind.discard(id)
+        try:
+            item, parts = split_index(context_item(id, context, goal, tone, schema_context, context_tokens, token_budget, context_index))
+            # Parts first, so the item never references an index that isn't there yet
+            if parts:
+                await self._run(self._batch_write, parts, [])
+            response = await self._run(self.table.put_item, Item=item, ReturnValues="ALL_OLD")
+            self._invalidate(id)
+            await self._delete_index_parts(id, int(response.get("Attributes", {}).get("index_parts", 0)), start=len(parts))
+            logging.info(f"Message context and schema_context for id {id} saved successfully.")
+        except ClientError as e:
+            logging.error(f"Failed to save message context and schema_context for id {id}: {e}")
+            raise
+
+    def _batch_write(self, puts, deletes):
+        # batch_writer sends BatchWriteItem calls of 25 and re-sends any
+        # UnprocessedItems until the buffer is empty
+        with self.table.batch_writer(overwrite_by_pkeys=["id"]) as batch:
+            for item in puts:
+                batch.put_item(Item=item)
+            for id in deletes:
+                batch.delete_item(Key={"id": id})
+
+    async def _write_parallel(self, puts, deletes):
+        # Split across a few writers so thousands of ids aren't one serial stream
+        writers = max(1, min(BATCH_WRITE_PARALLELISM, (len(puts) + len(deletes) + 24) // 25))
+        await asyncio.gather(*(
+            self._run(self._batch_write, puts[n::writers], deletes[n::writers])
+            for n in range(writers)
+        ))
+
+    async def batch_write(self, puts, deletes=()):
+        deletes = list(deletes)
+        ids = [item["id"] for item in puts] + deletes
+        for id in ids:
+            self._invalidate(id)
+        try:
+            items, parts = [], []
+            for item in puts:
+                item, item_parts = split_index(item)
+                items.append(item)
+                parts.extend(item_parts)
+            # Index parts land before the items that reference them
+            if parts:
+                await self._write_parallel(parts, [])
+            part_counts = await self._index_parts(deletes) if deletes else {}
+            part_ids = [index_part_id(id, n) for id, count in part_counts.items() for n in range(count)]
+            await self._write_parallel(items, deletes + part_ids)
+            for id in ids:
+                self._invalidate(id)
+            logging.info(f"Batch wrote {len(puts)} message contexts and deleted {len(deletes)}.")
+        except ClientError as e:
+            logging.error(f"Failed to batch write {len(ids)} message contexts: {e}")
+            raise
+
+    async def batch_update_message_contexts(self, items, write_behind=False):
+        if write_behind:
+            for item in items:
+                self._invalidate(item["id"])
+                self.write_behind.put(item["id"], item)
+            return
+        await self.batch_write(items)
+
+    async def batch_delete(self, ids, write_behind=False):
+        if write_behind:
+            for id in ids:
+                self._invalidate(id)
+                self.write_behind.delete(id)
+            return
+        await self.batch_write([], ids)
+
+    async def get_summary(self, key):
+        try:
+            response = await self._run(self.table.get_item, Key={"id": f"{SUMMARY_PREFIX}{key}"})
+            item = response.get("Item")
+            if not item:
+                return None
+            return {
+                "summary": item.get("summary", ""),
+                "count": int(item.get("count", 0)),
+                "fingerprint": item.get("fingerprint", "")
+            }
+        except ClientError as e:
+            logging.error(f"Failed to retrieve conversation summary for {key}: {e}")
+            raise
+
+    async def save_summary(self, key, summary):
         try:
-            # Save both context and schema_context in DynamoDB
-            self.table.put_item(
+            await self._run(
+                self.table.put_item,
                 Item={
-                    "id": id,
-                    "context": context,
-                    "goal": goal,
-                    "tone": tone,
-                    "schema_context": schema_context
+                    "id": f"{SUMMARY_PREFIX}{key}",
+                    "summary": summary["summary"],
+                    "count": summary["count"],
+                    "fingerprint": summary["fingerprint"]
                 }
             )
-            logging.info(f"Message context and schema_context for id {id} saved successfully.")
+            logging.info(f"Conversation summary for {key} saved successfully.")
         except ClientError as e:
-            logging.error(f"Failed to save message context and schema_context for id {id}: {e}")
+            logging.error(f"Failed to save conversation summary for {key}: {e}")
             raise
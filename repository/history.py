@@ -0,0 +1,94 @@
+import json
+import zlib
+import time
+import asyncio
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.types import Binary
+from repository import get_dynamo_table
+from botocore.exceptions import ClientError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Role flags in the stored log: 1 for the prospect, 0 for us
+ROLE_FLAGS = {"user": 1, "assistant": 0}
+FLAG_ROLES = {flag: role for role, flag in ROLE_FLAGS.items()}
+
+def encode_log(messages):
+    # Compact [flag, content] pairs, zlib-compressed
+    compact = [[ROLE_FLAGS[message["role"]], message["content"]] for message in messages]
+    return zlib.compress(json.dumps(compact, separators=(",", ":")).encode())
+
+def decode_log(blob):
+    return [{"role": FLAG_ROLES[flag], "content": content} for flag, content in json.loads(zlib.decompress(blob))]
+
+
+class HistoryLogStore:
+    # Per-prospect communication history, kept so Bonzo only has to send
+    # messages newer than last_id
+    def __init__(self, table=None):
+        self.table_name = "prospect_history_bonzo"
+        self._table = table
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prospect-history")
+
+    @property
+    def table(self):
+        # Resolved on first use so constructing the store does no AWS work
+        if self._table is None:
+            self._table = get_dynamo_table(self.table_name)
+        return self._table
+
+    async def connect(self):
+        await self._run(lambda: self.table)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def get(self, key):
+        # {"messages", "last_id", "resynced_at"} or None
+        try:
+            response = await self._run(self.table.get_item, Key={"id": key})
+        except ClientError as e:
+            logging.error(f"Failed to read history log {key}: {e}")
+            raise
+        item = response.get("Item")
+        if not item:
+            return None
+        blob = item["log"]
+        return {
+            "messages": await self._run(decode_log, blob.value if isinstance(blob, Binary) else blob),
+            "last_id": int(item["last_id"]),
+            "resynced_at": float(item["resynced_at"])
+        }
+
+    async def put(self, key, messages, last_id, resynced_at):
+        try:
+            blob = await self._run(encode_log, messages)
+            await self._run(
+                self.table.put_item,
+                Item={
+                    "id": key,
+                    "log": Binary(blob),
+                    "last_id": last_id,
+                    "count": len(messages),
+                    "resynced_at": int(resynced_at),
+                    "updated_at": int(time.time())
+                }
+            )
+        except ClientError as e:
+            logging.error(f"Failed to write history log {key}: {e}")
+            raise
+
+    async def invalidate(self, key):
+        try:
+            await self._run(self.table.delete_item, Key={"id": key})
+        except ClientError as e:
+            logging.error(f"Failed to delete history log {key}: {e}")
+            raise
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from repository import get_dynamo_table
+from repository.cache import TTLCache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_TTL = float(os.environ.get("JOB_TTL", "3600"))
+JOB_MAXSIZE = int(os.environ.get("JOB_MAXSIZE", "10000"))
+# "memory" (per container) or "dynamo" (shared, so a job can be polled and an
+# Idempotency-Key replayed on any container)
+JOB_STORE = os.environ.get("JOB_STORE", "memory")
+
+# Idempotency keys share the jobs table under this id prefix
+IDEMPOTENCY_PREFIX = "key#"
+
+
+def new_job(kind, **fields):
+    return {
+        "job_id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "pending",
+        "created_at": time.time(),
+        "updated_at": time.time(),
+        **fields
+    }
+
+def get_job_store(name=JOB_STORE):
+    if name == "dynamo":
+        return DynamoJobStore()
+    return InMemoryJobStore()
+
+
+class InMemoryJobStore:
+    def __init__(self, ttl=JOB_TTL, maxsize=JOB_MAXSIZE):
+        self.jobs = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Idempotency key -> job_id, kept as long as the job itself
+        self.keys = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def create(self, kind, **fields):
+        job = new_job(kind, **fields)
+        self.jobs.set(job["job_id"], job)
+        logging.info(f"Job {job['job_id']} ({kind}) created.")
+        return job
+
+    async def create_once(self, kind, idempotency_key, **fields):
+        # Returns (job, created); retries with the same key get the original job
+        job_id = self.keys.get(idempotency_key)
+        if job_id is not None:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                logging.info(f"Job {job_id} reused for idempotency key {idempotency_key}.")
+                return job, False
+        job = await self.create(kind, idempotency_key=idempotency_key, **fields)
+        self.keys.set(idempotency_key, job["job_id"])
+        return job, True
+
+    async def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def update(self, job_id, **fields):
+        job = self.jobs.get(job_id)
+        if job is None:
+            logging.warning(f"Job {job_id} not found; it may have expired.")
+            return None
+        job.update(fields, updated_at=time.time())
+        self.jobs.set(job_id, job)
+        return job
+
+    async def delete(self, job_id):
+        # Drops a job that never ran, releasing its idempotency key for a retry
+        job = self.jobs.get(job_id)
+        self.jobs.invalidate(job_id)
+        if job is not None and job.get("idempotency_key") and self.keys.get(job["idempotency_key"]) == job_id:
+            self.keys.invalidate(job["idempotency_key"])
+        logging.info(f"Job {job_id} deleted.")
+
+
+class DynamoJobStore:
+    # Same interface as InMemoryJobStore, shared by every container. Jobs are
+    # stored as JSON strings since results contain floats DynamoDB won't accept;
+    # expires_at doubles as the DynamoDB TTL attribute.
+    def __init__(self, table=None, ttl=JOB_TTL):
+        self.table_name = "jobs_bonzo"
+        self._table = table
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jobs")
+
+    @property
+    def table(self):
+        # Resolved on first use so constructing the store does no AWS work
+        if self._table is None:
+            self._table = get_dynamo_table(self.table_name)
+        return self._table
+
+    async def connect(self):
+        await self._run(lambda: self.table)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def _expires_at(self):
+        return int(time.time() + self.ttl)
+
+    async def _put(self, job):
+        try:
+            await self._run(self.table.put_item, Item={"id": job["job_id"], "job": json.dumps(job), "expires_at": self._expires_at()})
+        except ClientError as e:
+            logging.error(f"Failed to write job {job['job_id']}: {e}")
+            raise
+
+    async def create(self, kind, **fields):
+        job = new_job(kind, **fields)
+        await self._put(job)
+        logging.info(f"Job {job['job_id']} ({kind}) created.")
+        return job
+
+    async def create_once(self, kind, idempotency_key, **fields):
+        # The key row is claimed with a conditional put, so concurrent retries
+        # on different containers agree on one job
+        job = await self.create(kind, idempotency_key=idempotency_key, **fields)
+        key_item = {"id": f"{IDEMPOTENCY_PREFIX}{idempotency_key}", "job_id": job["job_id"], "expires_at": self._expires_at()}
+        try:
+            await self._run(
+                self.table.put_item,
+                Item=key_item,
+                ConditionExpression=Attr("id").not_exists() | Attr("expires_at").lte(int(time.time()))
+            )
+            return job, True
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logging.error(f"Failed to claim idempotency key {idempotency_key}: {e}")
+                raise
+
+        try:
+            response = await self._run(self.table.get_item, Key={"id": key_item["id"]}, ConsistentRead=True)
+            existing = await self.get(response.get("Item", {}).get("job_id"))
+            if existing is not None:
+                await self._run(self.table.delete_item, Key={"id": job["job_id"]})
+                logging.info(f"Job {existing['job_id']} reused for idempotency key {idempotency_key}.")
+                return existing, False
+            # The key outlived its job; it now belongs to this one
+            await self._run(self.table.put_item, Item=key_item)
+        except ClientError as e:
+            logging.error(f"Failed to resolve idempotency key {idempotency_key}: {e}")
+            raise
+        return job, True
+
+    async def get(self, job_id):
+        if not job_id:
+            return None
+        try:
+            # Strongly consistent so a poll sees updates made on another container
+            response = await self._run(self.table.get_item, Key={"id": job_id}, ConsistentRead=True)
+        except ClientError as e:
+            logging.error(f"Failed to read job {job_id}: {e}")
+            raise
+        item = response.get("Item")
+        # TTL deletes lazily
+        if not item or "job" not in item or int(item["expires_at"]) <= time.time():
+            return None
+        return json.loads(item["job"])
+
+    async def update(self, job_id, **fields):
+        # Read-modify-write: a job is only ever updated by the container running it
+        job = await self.get(job_id)
+        if job is None:
+            logging.warning(f"Job {job_id} not found; it may have expired.")
+            return None
+        job.update(fields, updated_at=time.time())
+        await self._put(job)
+        return job
+
+    async def delete(self, job_id):
+        # Drops a job that never ran, releasing its idempotency key for a retry
+        job = await self.get(job_id)
+        try:
+            await self._run(self.table.delete_item, Key={"id": job_id})
+            if job is not None and job.get("idempotency_key"):
+                await self._run(
+                    self.table.delete_item,
+                    Key={"id": f"{IDEMPOTENCY_PREFIX}{job['idempotency_key']}"},
+                    ConditionExpression=Attr("job_id").eq(job_id)
+                )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logging.error(f"Failed to delete job {job_id}: {e}")
+                raise
+        logging.info(f"Job {job_id} deleted.")
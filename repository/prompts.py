@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from repository import get_dynamo_table
+from botocore.exceptions import ClientError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PromptStore:
+    def __init__(self, table=None):
+        self.table_name = "prompt_registry_bonzo"
+        self._table = table
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prompts")
+
+    @property
+    def table(self):
+        # Resolved on first use so constructing the store does no AWS work
+        if self._table is None:
+            self._table = get_dynamo_table(self.table_name)
+        return self._table
+
+    async def connect(self):
+        # Builds the boto3 resource off the event loop ahead of the first request
+        await self._run(lambda: self.table)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def get_all(self):
+        try:
+            items = []
+            kwargs = {}
+            while True:
+                response = await self._run(self.table.scan, **kwargs)
+                items.extend(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+            logging.info(f"Loaded {len(items)} stored prompt versions.")
+            return [
+                {
+                    "prompt_id": item["prompt_id"],
+                    "tenant": item.get("tenant") or None,
+                    "version": int(item["version"]),
+                    "content": item["content"]
+                } for item in items
+            ]
+        except ClientError as e:
+            logging.error(f"Failed to load stored prompts: {e}")
+            raise
+
+    async def put(self, prompt_id, content, version, tenant=None):
+        try:
+            await self._run(
+                self.table.put_item,
+                Item={
+                    "id": f"{tenant or '*'}#{prompt_id}#v{version}",
+                    "prompt_id": prompt_id,
+                    "tenant": tenant or "",
+                    "version": version,
+                    "content": content
+                },
+                # Never overwrite an existing version
+                ConditionExpression="attribute_not_exists(id)"
+            )
+            logging.info(f"Prompt {prompt_id} v{version} for tenant {tenant or '*'} saved successfully.")
+        except ClientError as e:
+            logging.error(f"Failed to save prompt {prompt_id} v{version}: {e}")
+            raise
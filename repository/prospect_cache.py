@@ -0,0 +1,66 @@
+import json
+import time
+import asyncio
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from repository import get_dynamo_table
+from botocore.exceptions import ClientError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ProspectCacheStore:
+    # Shared prospect cache for multiple containers. Entries are stored as
+    # JSON strings since Bonzo payloads contain floats DynamoDB won't accept.
+    def __init__(self, table=None):
+        self.table_name = "prospect_cache_bonzo"
+        self._table = table
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prospect-cache")
+
+    @property
+    def table(self):
+        # Resolved on first use so constructing the store does no AWS work
+        if self._table is None:
+            self._table = get_dynamo_table(self.table_name)
+        return self._table
+
+    async def connect(self):
+        await self._run(lambda: self.table)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def get(self, key):
+        try:
+            response = await self._run(self.table.get_item, Key={"id": key})
+            item = response.get("Item")
+            # expires_at doubles as the DynamoDB TTL attribute, which deletes lazily
+            if not item or int(item["expires_at"]) <= time.time():
+                return None
+            return json.loads(item["entry"])
+        except ClientError as e:
+            logging.error(f"Failed to read prospect cache entry {key}: {e}")
+            raise
+
+    async def set(self, key, entry, ttl):
+        try:
+            await self._run(
+                self.table.put_item,
+                Item={"id": key, "entry": json.dumps(entry), "expires_at": int(time.time() + ttl)}
+            )
+        except ClientError as e:
+            logging.error(f"Failed to write prospect cache entry {key}: {e}")
+            raise
+
+    async def invalidate(self, key):
+        try:
+            await self._run(self.table.delete_item, Key={"id": key})
+        except ClientError as e:
+            logging.error(f"Failed to delete prospect cache entry {key}: {e}")
+            raise
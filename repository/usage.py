@@ -0,0 +1,66 @@
+import math
+import asyncio
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr
+from repository import get_dynamo_table
+from botocore.exceptions import ClientError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class UsageStore:
+    def __init__(self, table=None):
+        self.table_name = "usage_ledger_bonzo"
+        self._table = table
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="usage")
+
+    @property
+    def table(self):
+        # Resolved on first use so constructing the store does no AWS work
+        if self._table is None:
+            self._table = get_dynamo_table(self.table_name)
+        return self._table
+
+    async def connect(self):
+        # Builds the boto3 resource off the event loop ahead of the first request
+        await self._run(lambda: self.table)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def _write(self, items):
+        # BatchWriteItem in chunks of 25, retrying unprocessed items
+        with self.table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    async def write(self, items):
+        try:
+            await self._run(self._write, items)
+            logging.info(f"Wrote {len(items)} usage ledger rows.")
+        except ClientError as e:
+            logging.error(f"Failed to write usage ledger rows: {e}")
+            raise
+
+    async def scan(self, start, end):
+        try:
+            items = []
+            # Buckets are whole seconds and boto3 rejects float operands
+            kwargs = {"FilterExpression": Attr("bucket").between(math.ceil(start), math.floor(end))}
+            while True:
+                response = await self._run(self.table.scan, **kwargs)
+                items.extend(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+            return items
+        except ClientError as e:
+            logging.error(f"Failed to scan usage ledger: {e}")
+            raise
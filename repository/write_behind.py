@@ -0,0 +1,157 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from botocore.exceptions import ClientError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Buffered writes are flushed once this many ids are pending or after this many seconds
+WRITE_BEHIND_MAX_ITEMS = int(os.environ.get("WRITE_BEHIND_MAX_ITEMS", "500"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.environ.get("WRITE_BEHIND_FLUSH_SECONDS", "2"))
+# Failed flushes (throttling, network) are retried this many times per id
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.environ.get("WRITE_BEHIND_MAX_ATTEMPTS", "10"))
+WRITE_BEHIND_DEAD_LETTERS = int(os.environ.get("WRITE_BEHIND_DEAD_LETTERS", "1000"))
+
+# Errors no retry can fix, e.g. an item over DynamoDB's size limit
+PERMANENT_ERRORS = ("ValidationException", "SerializationException", "ItemCollectionSizeLimitExceededException")
+
+# Marks a pending delete in the buffer
+DELETED = object()
+
+
+def is_permanent(error):
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in PERMANENT_ERRORS
+
+
+class WriteBehindBuffer:
+    def __init__(self, write_fn, max_items=WRITE_BEHIND_MAX_ITEMS, flush_seconds=WRITE_BEHIND_FLUSH_SECONDS, max_attempts=WRITE_BEHIND_MAX_ATTEMPTS):
+        # write_fn(puts, deletes) persists a list of items and a list of ids
+        self.write_fn = write_fn
+        self.max_items = max_items
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+        self.pending = {}
+        # Failed attempts per id for the value currently pending
+        self.attempts = {}
+        # Writes given up on, newest last: {"id", "error"}
+        self.dead_letters = deque(maxlen=WRITE_BEHIND_DEAD_LETTERS)
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.flushes = 0
+        self.flushed_items = 0
+        self.flush_failures = 0
+        self.dropped = 0
+
+    def put(self, id, item):
+        # Last write per id wins, so repeated syncs of one id cost one write
+        self.pending[id] = item
+        self.attempts.pop(id, None)
+        self._maybe_flush()
+
+    def delete(self, id):
+        self.pending[id] = DELETED
+        self.attempts.pop(id, None)
+        self._maybe_flush()
+
+    def discard(self, id):
+        # A direct write supersedes anything still buffered for the id
+        self.pending.pop(id, None)
+        self.attempts.pop(id, None)
+
+    def lookup(self, id):
+        # (True, item or None) while a write for id is pending, (False, None) otherwise
+        if id not in self.pending:
+            return False, None
+        item = self.pending[id]
+        return True, None if item is DELETED else item
+
+    def _maybe_flush(self):
+        if len(self.pending) >= self.max_items:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    def _dead_letter(self, ids, error):
+        self.dropped += len(ids)
+        for id in ids:
+            self.attempts.pop(id, None)
+            self.dead_letters.append({"id": id, "error": str(error)})
+        logging.error(f"Write-behind dropped {len(ids)} writes ({', '.join(ids[:10])}): {error}")
+
+    async def _write(self, batch):
+        # Writes batch, returning {id: error} for writes that may succeed on retry.
+        # A permanent error is narrowed down by halving the batch, so one bad item
+        # doesn't hold back the rest.
+        puts = [item for item in batch.values() if item is not DELETED]
+        deletes = [id for id, item in batch.items() if item is DELETED]
+        try:
+            await self.write_fn(puts, deletes)
+            self.flushed_items += len(batch)
+            return {}
+        except Exception as e:
+            if not is_permanent(e):
+                return dict.fromkeys(batch, e)
+            if len(batch) == 1:
+                self._dead_letter(list(batch), e)
+                return {}
+            ids = list(batch)
+            middle = len(ids) // 2
+            failed = await self._write({id: batch[id] for id in ids[:middle]})
+            failed.update(await self._write({id: batch[id] for id in ids[middle:]}))
+            return failed
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, {}
+            failed = await self._write(batch)
+            self.flushes += 1
+            for id in batch:
+                if id not in failed:
+                    self.attempts.pop(id, None)
+            if not failed:
+                return
+
+            self.flush_failures += 1
+            error = next(iter(failed.values()))
+            exhausted = []
+            for id in failed:
+                # A newer write for the id that arrived meanwhile replaces this one
+                if id in self.pending:
+                    continue
+                attempts = self.attempts.get(id, 0) + 1
+                if attempts >= self.max_attempts:
+                    exhausted.append(id)
+                    continue
+                self.attempts[id] = attempts
+                self.pending[id] = batch[id]
+            logging.error(f"Write-behind flush of {len(failed)} items failed, {len(failed) - len(exhausted)} retrying next interval: {error}")
+            if exhausted:
+                self._dead_letter(exhausted, f"gave up after {self.max_attempts} attempts: {error}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self):
+        self.task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "pending": len(self.pending),
+            "flushes": self.flushes,
+            "flushed_items": self.flushed_items,
+            "flush_failures": self.flush_failures,
+            "dropped": self.dropped,
+            "dead_letters": list(self.dead_letters)[-10:]
+        }
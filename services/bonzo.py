@@ -0,0 +1,256 @@
+import os
+import asyncio
+import logging
+import aiohttp
+from services.metrics import timed
+from services.prospect_cache import NOT_MODIFIED
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BONZO_API_BASE = os.environ.get("BONZO_API_BASE", "https://app.getbonzo.com/api/v3")
+
+# Per-call timeout (seconds) for the read-only prospect fetches
+BONZO_FETCH_TIMEOUT = float(os.environ.get("BONZO_FETCH_TIMEOUT", "10"))
+
+# Connection pool for the shared session
+BONZO_POOL_LIMIT = int(os.environ.get("BONZO_POOL_LIMIT", "100"))
+BONZO_POOL_LIMIT_PER_HOST = int(os.environ.get("BONZO_POOL_LIMIT_PER_HOST", "50"))
+BONZO_DNS_CACHE_TTL = int(os.environ.get("BONZO_DNS_CACHE_TTL", "300"))
+BONZO_KEEPALIVE_TIMEOUT = float(os.environ.get("BONZO_KEEPALIVE_TIMEOUT", "30"))
+
+
+class BonzoAPIError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class PoolStats:
+    def __init__(self):
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.max_in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.queued_total = 0
+        self.queue_wait_seconds = 0.0
+
+    def trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_done)
+        trace_config.on_request_exception.append(self._on_request_done)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_connection_queued_end)
+        return trace_config
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.requests_in_flight)
+
+    async def _on_request_done(self, session, ctx, params):
+        self.requests_in_flight -= 1
+
+    async def _on_connection_create_end(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, ctx, params):
+        self.connections_reused += 1
+
+    async def _on_connection_queued_start(self, session, ctx, params):
+        self.queued_total += 1
+        ctx.queued_at = asyncio.get_running_loop().time()
+
+    async def _on_connection_queued_end(self, session, ctx, params):
+        self.queue_wait_seconds += asyncio.get_running_loop().time() - ctx.queued_at
+
+    def snapshot(self, connector=None):
+        connections = self.connections_created + self.connections_reused
+        stats = {
+            "requests_total": self.requests_total,
+            "requests_in_flight": self.requests_in_flight,
+            "max_in_flight": self.max_in_flight,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": self.connections_reused / connections if connections else 0.0,
+            "queued_total": self.queued_total,
+            "queue_wait_seconds": self.queue_wait_seconds
+        }
+        if connector is not None:
+            stats["limit"] = connector.limit
+            stats["limit_per_host"] = connector.limit_per_host
+            stats["utilisation"] = self.requests_in_flight / connector.limit if connector.limit else 0.0
+        return stats
+
+
+def create_session(stats=None):
+    connector = aiohttp.TCPConnector(
+        limit=BONZO_POOL_LIMIT,
+        limit_per_host=BONZO_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=BONZO_DNS_CACHE_TTL,
+        keepalive_timeout=BONZO_KEEPALIVE_TIMEOUT
+    )
+    trace_configs = [stats.trace_config()] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+
+def bonzo_headers(auth_token, on_behalf_of):
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {auth_token}",
+        "On-Behalf-Of": on_behalf_of
+    }
+
+def prospect_url(prospect_id, path=""):
+    return f"{BONZO_API_BASE}/prospects/{prospect_id}{path}"
+
+def fetch_timeout():
+    return aiohttp.ClientTimeout(total=BONZO_FETCH_TIMEOUT)
+
+async def fetch_communication_items(session, prospect_id, headers):
+    # Raw communication items from a single unparameterised GET
+    async with session.get(prospect_url(prospect_id, "/communication"), headers=headers, timeout=fetch_timeout()) as response:
+        if response.status != 200:
+            logger.error(f"Failed to fetch communication history: {response.status}")
+            raise BonzoAPIError(f"Failed to fetch communication history: {response.status}", 500)
+
+        response_data = await response.json()
+
+    return response_data.get("data") or []
+
+def message_id(item):
+    try:
+        return int(item.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+def build_message_history(items):
+    # Build message history, only keeping messages with content
+    return [
+        {
+            "role": "user" if item.get("direction") == "incoming" else "assistant",
+            "content": item.get("content")
+        }
+        for item in items if item.get("content")
+    ]
+
+async def fetch_communication_history(session, prospect_id, headers, history=None):
+    if history is not None:
+        message_history = await history.sync(session, prospect_id, headers)
+    else:
+        data = await fetch_communication_items(session, prospect_id, headers)
+        if not data:
+            logger.warning(f"No communication history found for prospect {prospect_id}")
+            raise BonzoAPIError("No communication history found", 404)
+        message_history = build_message_history(data)
+
+    if not message_history:
+        logger.warning(f"No valid messages found in communication history for prospect {prospect_id}")
+        raise BonzoAPIError("No valid messages found in communication history", 404)
+
+    return message_history
+
+def conditional_headers(headers, validators):
+    # Revalidate a cached copy; Bonzo answers 304 if it still matches
+    if not validators:
+        return headers
+    headers = dict(headers)
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+def response_validators(response):
+    return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+def cache_key(headers, prospect_id, resource):
+    # Prospect data is only visible to the user it was fetched on behalf of
+    return f"{headers.get('On-Behalf-Of')}#{prospect_id}#{resource}"
+
+async def get_prospect(session, prospect_id, headers, validators=None):
+    async with session.get(prospect_url(prospect_id), headers=conditional_headers(headers, validators), timeout=fetch_timeout()) as response:
+        if response.status == 304 and validators:
+            return NOT_MODIFIED
+        if response.status != 200:
+            logger.error(f"Failed to fetch prospect info: {response.status}")
+            raise BonzoAPIError(f"Failed to fetch prospect info: {response.status}", 500)
+
+        res = await response.json()
+
+    prospect_data = res.get("data")
+    if not prospect_data:
+        logger.warning(f"No prospect info found for prospect {prospect_id}")
+        raise BonzoAPIError("No prospect info found", 404)
+
+    return prospect_data, response_validators(response)
+
+async def fetch_prospect(session, prospect_id, headers, cache=None):
+    if cache is None:
+        prospect_data, _ = await get_prospect(session, prospect_id, headers)
+        return prospect_data
+    return await cache.fetch(
+        cache_key(headers, prospect_id, "prospect"),
+        lambda validators: get_prospect(session, prospect_id, headers, validators)
+    )
+
+async def get_notes(session, prospect_id, headers, validators=None):
+    async with session.get(prospect_url(prospect_id, "/notes"), headers=conditional_headers(headers, validators), timeout=fetch_timeout()) as response:
+        if response.status == 304 and validators:
+            return NOT_MODIFIED
+        if response.status != 200:
+            raise BonzoAPIError(f"Failed to fetch prospect notes: {response.status}", response.status)
+
+        notes_response = await response.json()
+
+    # Extract just the content from each note
+    notes_data = notes_response.get("data", [])
+    return [note.get("content", "") for note in notes_data if note.get("content")], response_validators(response)
+
+async def fetch_notes(session, prospect_id, headers, cache=None):
+    # Notes are optional: any failure degrades to an empty list, which is never cached
+    try:
+        if cache is None:
+            notes_content, _ = await get_notes(session, prospect_id, headers)
+            return notes_content
+        return await cache.fetch(
+            cache_key(headers, prospect_id, "notes"),
+            lambda validators: get_notes(session, prospect_id, headers, validators)
+        )
+    except (BonzoAPIError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logger.warning(f"Failed to fetch prospect notes: {e!r}")
+        return []
+
+async def fetch_prospect_context(session, prospect_id, headers, cache=None, history=None):
+    message_history, prospect_data, notes_content = await asyncio.gather(
+        timed("bonzo.communication", fetch_communication_history(session, prospect_id, headers, history)),
+        timed("bonzo.prospect", fetch_prospect(session, prospect_id, headers, cache)),
+        timed("bonzo.notes", fetch_notes(session, prospect_id, headers, cache)),
+        return_exceptions=True
+    )
+
+    # Surface failures in the same order the calls used to be made
+    for result in (message_history, prospect_data, notes_content):
+        if isinstance(result, BaseException):
+            raise result
+
+    return message_history, prospect_data, notes_content
+
+async def send_sms(session, prospect_id, headers, message):
+    payload = {
+        "message": message,
+        "send_as": "owner"
+    }
+
+    async with session.post(prospect_url(prospect_id, "/sms"), headers=headers, json=payload) as send_response:
+        if send_response.status != 200:
+            logger.error(f"Failed to send message: {await send_response.json()}")
+            logger.error(f"Failed to send message: {send_response.status}")
+            raise BonzoAPIError(f"Failed to send message: {send_response.status}", 500)
+
+        return await send_response.json()
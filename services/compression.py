@@ -0,0 +1,88 @@
+import os
+import gzip
+import asyncio
+import logging
+from quart.wrappers.response import DataBody
+from services.metrics import span
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this aren't worth the CPU; 0 disables compression
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "5"))
+# Larger bodies are compressed off the event loop
+COMPRESS_OFFLOAD_BYTES = int(os.environ.get("COMPRESS_OFFLOAD_BYTES", "262144"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class ResponseCompressor:
+    def __init__(self, min_bytes=COMPRESS_MIN_BYTES, gzip_level=COMPRESS_GZIP_LEVEL, brotli_quality=COMPRESS_BROTLI_QUALITY, offload_bytes=COMPRESS_OFFLOAD_BYTES):
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.offload_bytes = offload_bytes
+        # Preferred first when the client rates them equally
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        self.compressed = {}
+        self.skipped_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _compress(self, encoding, body):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def compress(self, request, response):
+        # Streamed bodies (SSE, NDJSON export) are left alone so they keep flowing
+        if (
+            not self.min_bytes
+            or request.method == "HEAD"
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or not isinstance(response.response, DataBody)
+            or not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        body = await response.get_data()
+        if len(body) < self.min_bytes:
+            self.skipped_small += 1
+            return response
+
+        with span("response.compress"):
+            if len(body) >= self.offload_bytes:
+                compressed = await asyncio.to_thread(self._compress, encoding, body)
+            else:
+                compressed = self._compress(encoding, body)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        self.compressed[encoding] = self.compressed.get(encoding, 0) + 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return response
+
+    def stats(self):
+        return {
+            "encodings": list(self.encodings),
+            "compressed": self.compressed,
+            "skipped_small": self.skipped_small,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else None
+        }
@@ -0,0 +1,96 @@
+import os
+import re
+import asyncio
+import hashlib
+import numpy as np
+
+# "hashing" is a deterministic local embedder (no network); "openai" uses the
+# embeddings API
+CONTEXT_EMBEDDER = os.environ.get("CONTEXT_EMBEDDER", "hashing")
+EMBEDDING_DIM = int(os.environ.get("EMBEDDING_DIM", "256"))
+OPENAI_EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+# The embeddings API accepts at most 2048 inputs per request
+OPENAI_EMBEDDING_BATCH = int(os.environ.get("OPENAI_EMBEDDING_BATCH", "2048"))
+
+WORD = re.compile(r"\w+")
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HashingEmbedder:
+    # Signed feature hashing of word unigrams and bigrams
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed_one(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = WORD.findall(text.lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        return vector
+
+    def embed_many(self, texts):
+        return normalize_rows(np.stack([self.embed_one(text) for text in texts]))
+
+    async def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        # A single query is cheaper inline; bulk uploads hash off the event loop
+        if len(texts) == 1:
+            return self.embed_many(texts)
+        return await asyncio.to_thread(self.embed_many, texts)
+
+
+class OpenAIEmbedder:
+    def __init__(self, client, rate_limiter, model=OPENAI_EMBEDDING_MODEL, dim=EMBEDDING_DIM):
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self.model = model
+        self.dim = dim
+        self.name = f"{model}-{dim}"
+
+    async def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if len(texts) > OPENAI_EMBEDDING_BATCH:
+            blocks = await asyncio.gather(*(
+                self.embed(texts[start:start + OPENAI_EMBEDDING_BATCH])
+                for start in range(0, len(texts), OPENAI_EMBEDDING_BATCH)
+            ))
+            return np.concatenate(blocks)
+        response = await self.rate_limiter.call(
+            self.model,
+            lambda: self.client.embeddings.with_raw_response.create(model=self.model, input=texts, dimensions=self.dim),
+            sum(len(text) for text in texts) // 4
+        )
+        return normalize_rows(np.array([item.embedding for item in response.data], dtype=np.float32))
+
+
+def get_embedder(client=None, rate_limiter=None, name=CONTEXT_EMBEDDER):
+    if name == "openai":
+        return OpenAIEmbedder(client, rate_limiter)
+    return HashingEmbedder()
+
+def encode_index(matrix):
+    # float16 keeps a 256-dim vector at 512 bytes; large indexes are split
+    # across sidecar rows by the context store
+    return matrix.astype(np.float16).tobytes()
+
+def decode_index(blob, dim):
+    return np.frombuffer(bytes(blob), dtype=np.float16).astype(np.float32).reshape(-1, dim)
+
+def top_k(matrix, query, k):
+    # Cosine similarity on L2-normalised rows is a single matrix-vector product
+    scores = matrix @ query
+    if k < len(scores):
+        indices = np.argpartition(-scores, k)[:k]
+    else:
+        indices = np.arange(len(scores))
+    indices = indices[np.argsort(-scores[indices])]
+    return indices, scores[indices]
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+from repository.cache import TTLCache
+from services.bonzo import BonzoAPIError, build_message_history, cache_key, fetch_timeout, message_id, prospect_url
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "true" keeps a per-prospect history log and only fetches newer messages from Bonzo.
+# Off by default: it relies on Bonzo honouring the cursor parameter and on
+# integer message ids that increase over time.
+PROSPECT_HISTORY_SYNC = os.environ.get("PROSPECT_HISTORY_SYNC", "false").lower() == "true"
+# Logs older than this are rebuilt from the full history, picking up edits and deletions
+HISTORY_RESYNC_SECONDS = float(os.environ.get("HISTORY_RESYNC_SECONDS", "86400"))
+# Decoded logs kept in this container, so warm prospects skip the table read too
+HISTORY_CACHE_MAXSIZE = int(os.environ.get("HISTORY_CACHE_MAXSIZE", "2000"))
+HISTORY_CACHE_TTL = float(os.environ.get("HISTORY_CACHE_TTL", "3600"))
+
+# Communication history paging: the cursor parameter carries the last message id
+# we already hold, and pages are followed through links.next
+BONZO_HISTORY_CURSOR_PARAM = os.environ.get("BONZO_HISTORY_CURSOR_PARAM", "after_id")
+BONZO_HISTORY_PAGE_SIZE = int(os.environ.get("BONZO_HISTORY_PAGE_SIZE", "100"))
+BONZO_HISTORY_MAX_PAGES = int(os.environ.get("BONZO_HISTORY_MAX_PAGES", "50"))
+
+
+async def fetch_communication_pages(session, prospect_id, headers, after_id=None):
+    # Raw communication items, oldest first; only those after after_id when given
+    url = prospect_url(prospect_id, "/communication")
+    params = {"per_page": BONZO_HISTORY_PAGE_SIZE}
+    if after_id is not None:
+        params[BONZO_HISTORY_CURSOR_PARAM] = after_id
+
+    items = []
+    for _ in range(BONZO_HISTORY_MAX_PAGES):
+        async with session.get(url, headers=headers, params=params, timeout=fetch_timeout()) as response:
+            if response.status != 200:
+                logger.error(f"Failed to fetch communication history: {response.status}")
+                raise BonzoAPIError(f"Failed to fetch communication history: {response.status}", 500)
+
+            response_data = await response.json()
+
+        items.extend(response_data.get("data") or [])
+        next_url = (response_data.get("links") or {}).get("next")
+        if not next_url:
+            break
+        # The next link already carries the query
+        url, params = next_url, None
+    else:
+        logger.warning(f"Communication history for prospect {prospect_id} truncated at {BONZO_HISTORY_MAX_PAGES} pages")
+
+    # An API that ignores the cursor still must not duplicate what we hold;
+    # messages without an integer id are kept so the caller can notice them
+    if after_id is not None:
+        items = [item for item in items if message_id(item) is None or message_id(item) > after_id]
+    return items
+
+
+class HistorySync:
+    def __init__(self, store, resync_seconds=HISTORY_RESYNC_SECONDS, maxsize=HISTORY_CACHE_MAXSIZE, ttl=HISTORY_CACHE_TTL):
+        self.store = store
+        self.resync_seconds = resync_seconds
+        self.logs = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.locks = {}
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.fetched_items = 0
+        self.appended = 0
+        self.store_errors = 0
+        self.unsyncable = 0
+
+    async def _load(self, key):
+        log = self.logs.get(key)
+        if log is not None:
+            return log
+        # A broken table degrades to a full fetch from Bonzo
+        try:
+            log = await self.store.get(key)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"History log read failed for {key}: {e}")
+            return None
+        if log is not None:
+            self.logs.set(key, log)
+        return log
+
+    async def _save(self, key, log):
+        self.logs.set(key, log)
+        try:
+            await self.store.put(key, log["messages"], log["last_id"], log["resynced_at"])
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"History log write failed for {key}: {e}")
+
+    async def sync(self, session, prospect_id, headers):
+        key = cache_key(headers, prospect_id, "communication")
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        try:
+            # Concurrent sends for one prospect share a log; the second one
+            # only asks Bonzo for what arrived after the first
+            async with lock:
+                return await self._sync(key, session, prospect_id, headers)
+        finally:
+            if not lock.locked():
+                self.locks.pop(key, None)
+
+    async def _sync(self, key, session, prospect_id, headers):
+        log = await self._load(key)
+        now = time.time()
+
+        if log is not None and log["last_id"] >= 0 and now - log["resynced_at"] < self.resync_seconds:
+            items = await fetch_communication_pages(session, prospect_id, headers, after_id=log["last_id"])
+            self.delta_syncs += 1
+            self.fetched_items += len(items)
+            ids = [message_id(item) for item in items]
+            if None not in ids:
+                if items:
+                    # Never trimmed: summary fingerprints cover the whole history
+                    messages = build_message_history(items)
+                    log = {"messages": log["messages"] + messages, "last_id": max(ids), "resynced_at": log["resynced_at"]}
+                    self.appended += len(messages)
+                    await self._save(key, log)
+                return list(log["messages"])
+            logger.warning(f"New messages for prospect {prospect_id} have non-integer ids; fetching the full history")
+
+        items = await fetch_communication_pages(session, prospect_id, headers)
+        self.full_syncs += 1
+        self.fetched_items += len(items)
+        if not items:
+            logger.warning(f"No communication history found for prospect {prospect_id}")
+            raise BonzoAPIError("No communication history found", 404)
+        messages = build_message_history(items)
+        ids = [message_id(item) for item in items]
+        # Deltas are found by id, so a log is only kept when every message has
+        # an integer id; otherwise the history is fetched in full every time
+        if None in ids:
+            self.unsyncable += 1
+            logger.warning(f"Communication history for prospect {prospect_id} has non-integer ids; not keeping a delta log")
+            await self._discard(key)
+            return messages
+        log = {"messages": messages, "last_id": max(ids), "resynced_at": now}
+        await self._save(key, log)
+        return list(log["messages"])
+
+    async def _discard(self, key):
+        self.logs.invalidate(key)
+        try:
+            await self.store.invalidate(key)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"History log delete failed for {key}: {e}")
+
+    async def invalidate(self, headers, prospect_id):
+        key = cache_key(headers, prospect_id, "communication")
+        self.logs.invalidate(key)
+        await self.store.invalidate(key)
+
+    def stats(self):
+        return {
+            "full_syncs": self.full_syncs,
+            "delta_syncs": self.delta_syncs,
+            "fetched_items": self.fetched_items,
+            "appended": self.appended,
+            "cached_logs": len(self.logs),
+            "store_errors": self.store_errors,
+            "unsyncable": self.unsyncable
+        }
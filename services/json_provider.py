@@ -0,0 +1,88 @@
+import os
+import json
+import logging
+from decimal import Decimal
+from quart.json.provider import DefaultJSONProvider
+from services.metrics import span
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "orjson" when installed, otherwise the stdlib json module
+JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "orjson")
+
+
+def json_default(value):
+    # boto3 returns DynamoDB numbers as Decimal
+    if isinstance(value, Decimal):
+        return int(value) if value % 1 == 0 else float(value)
+    return DefaultJSONProvider.default(value)
+
+def encode(obj, sort_keys=False, indent=False):
+    # UTF-8 JSON bytes
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=json_default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the stdlib still handles
+            pass
+    return json.dumps(
+        obj,
+        default=json_default,
+        sort_keys=sort_keys,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":")
+    ).encode()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # Response serialisation shows up as its own span in /metrics
+    default = staticmethod(json_default)
+
+    def dumps(self, obj, **kwargs):
+        with span("json.serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+class OrjsonProvider(TimedJSONProvider):
+    # Responses are encoded straight to bytes; dumps() calls with options
+    # orjson has no equivalent for go through the stdlib
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop("indent", None)
+        kwargs.pop("separators", None)
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        with span("json.serialize"):
+            return encode(obj, self.sort_keys, bool(indent)).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        with span("json.serialize"):
+            body = encode(obj, self.sort_keys, indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def get_json_provider(app, name=JSON_PROVIDER):
+    if name == "orjson":
+        if orjson is not None:
+            return OrjsonProvider(app)
+        logger.warning("JSON_PROVIDER=orjson but orjson is not installed; using the stdlib json module.")
+    return TimedJSONProvider(app)
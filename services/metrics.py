@@ -0,0 +1,166 @@
+import os
+import time
+import bisect
+import logging
+import contextvars
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Per-span instrumentation cost we allow ourselves; checked by benchmarks/metrics_overhead.py
+METRICS_OVERHEAD_BUDGET_US = float(os.environ.get("METRICS_OVERHEAD_BUDGET_US", "5"))
+
+# Spans outside a request (worker pool jobs, startup) are labelled with this endpoint
+BACKGROUND_ENDPOINT = "background"
+
+_current_request = contextvars.ContextVar("metrics_request", default=None)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names, values, extra=""):
+    labels = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    if extra:
+        labels = f"{labels},{extra}" if labels else extra
+    return f"{{{labels}}}" if labels else ""
+
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.series = {}
+
+    def observe(self, values, amount):
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, amount)] += 1
+        series[1] += amount
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, values, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, values, le)} {count}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, values)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, values, amount=1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self.series.items()):
+            lines.append(f"{self.name}{format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class RequestTimings:
+    __slots__ = ("endpoint", "started", "spans", "elapsed")
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.spans = []
+        self.elapsed = None
+
+    def server_timing(self):
+        # Server-Timing header value, durations in milliseconds
+        return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in self.spans)
+
+
+class Span:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.request_seconds = Histogram("bonzo_request_duration_seconds", "HTTP request latency", ("endpoint", "status"))
+        self.span_seconds = Histogram("bonzo_span_duration_seconds", "Latency of one phase of a request", ("endpoint", "span"))
+        self.tokens = Counter("bonzo_llm_tokens_total", "LLM tokens used", ("model", "kind"))
+        self.llm_calls = Counter("bonzo_llm_calls_total", "LLM calls with reported usage", ("model",))
+
+    def span(self, name):
+        return Span(self, name)
+
+    def observe_span(self, name, elapsed):
+        timings = _current_request.get()
+        if timings is None:
+            self.span_seconds.observe((BACKGROUND_ENDPOINT, name), elapsed)
+            return
+        self.span_seconds.observe((timings.endpoint, name), elapsed)
+        timings.spans.append((name, elapsed))
+
+    def begin_request(self, endpoint):
+        timings = RequestTimings(endpoint or "unknown")
+        _current_request.set(timings)
+        return timings
+
+    def end_request(self, status):
+        timings = _current_request.get()
+        if timings is None:
+            return None
+        timings.elapsed = elapsed = time.perf_counter() - timings.started
+        self.request_seconds.observe((timings.endpoint, str(status)), elapsed)
+        timings.spans.append(("total", elapsed))
+        return timings
+
+    def record_tokens(self, model, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        self.llm_calls.inc((model,))
+        self.tokens.inc((model, "prompt"), usage.prompt_tokens or 0)
+        self.tokens.inc((model, "completion"), getattr(usage, "completion_tokens", None) or 0)
+        self.tokens.inc((model, "cached"), cached_tokens)
+
+    def render(self):
+        lines = []
+        for metric in (self.request_seconds, self.span_seconds, self.tokens, self.llm_calls):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+span = metrics.span
+
+async def timed(name, awaitable):
+    with metrics.span(name):
+        return await awaitable
@@ -0,0 +1,39 @@
+import os
+import re
+from services.tokens import count_tokens
+
+# Default prompt budget for uploaded context chunks; override per id with
+# "token_budget" on /upload_context
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "6000"))
+
+WORD = re.compile(r"\w+")
+
+
+def keyword_scores(chunks, query):
+    # Share of the query's words that appear in each chunk
+    query_words = set(WORD.findall(query.lower()))
+    if not query_words:
+        return [0.0] * len(chunks)
+    return [len(query_words & set(WORD.findall(chunk.lower()))) / len(query_words) for chunk in chunks]
+
+def pack_context(chunks, token_counts, budget, scores=None):
+    # Greedily take the highest scoring chunks that fit the budget, then put
+    # them back in upload order so the prompt stays stable across turns.
+    # Returns the selected chunks and the tokens they use.
+    token_counts = [
+        int(token_counts[i]) if token_counts and i < len(token_counts) else count_tokens(chunk)
+        for i, chunk in enumerate(chunks)
+    ]
+    if sum(token_counts) <= budget:
+        return list(chunks), sum(token_counts)
+
+    scores = scores if scores is not None else [0.0] * len(chunks)
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+
+    selected, used = [], 0
+    for i in ranked:
+        if used + token_counts[i] <= budget:
+            selected.append(i)
+            used += token_counts[i]
+
+    return [chunks[i] for i in sorted(selected)], used
@@ -0,0 +1,61 @@
+import json
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def serialize(value):
+    # Byte-stable JSON so identical data always yields an identical prefix
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class PromptBuilder:
+    # Collects messages from most to least stable. Provider-side prompt
+    # caching reuses the longest identical prefix, so anything that changes
+    # per turn has to come after everything that doesn't.
+    def __init__(self):
+        self.prefix = []
+        self.turns = []
+
+    def stable(self, content, role="system"):
+        if content:
+            self.prefix.append({"role": role, "content": content})
+        return self
+
+    def data(self, label, value):
+        if value:
+            self.stable(f"{label}: {serialize(value)}")
+        return self
+
+    def turn(self, role, content):
+        if content and content.strip():
+            self.turns.append({"role": role, "content": content})
+        return self
+
+    def build(self):
+        return self.prefix + self.turns
+
+
+class PromptCacheStats:
+    def __init__(self):
+        self.models = {}
+
+    def record(self, model, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+        stats = self.models.setdefault(model, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += usage.prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+        logger.info(f"{model}: {usage.prompt_tokens} prompt tokens, {cached_tokens} served from the prompt cache")
+
+    def stats(self):
+        return {
+            model: {**stats, "cached_ratio": stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0}
+            for model, stats in self.models.items()
+        }
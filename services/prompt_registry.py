@@ -0,0 +1,107 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from services.tokens import count_tokens
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How often stored (tenant) prompts are reloaded so new ones appear without a redeploy
+PROMPT_REFRESH_SECONDS = float(os.environ.get("PROMPT_REFRESH_SECONDS", "60"))
+
+
+class PromptRegistry:
+    def __init__(self, builtin, store=None, refresh_seconds=PROMPT_REFRESH_SECONDS):
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+        # None until the first load (or failed attempt); monotonic time otherwise
+        self.loaded_at = None
+        # One scan at a time; callers waiting on it reuse its result
+        self.lock = asyncio.Lock()
+        self.task = None
+        # (tenant, prompt_id) -> latest version; tenant None holds the global prompts
+        self.prompts = {}
+        for prompt_id, content in builtin.items():
+            self.register(prompt_id, content, version=0)
+
+    def register(self, prompt_id, content, version, tenant=None):
+        key = (tenant or None, str(prompt_id))
+        current = self.prompts.get(key)
+        if current and current["version"] >= version:
+            return current
+
+        # Precomputed once per version rather than on every request
+        entry = {
+            "prompt_id": str(prompt_id),
+            "tenant": tenant or None,
+            "version": version,
+            "content": content,
+            "sha256": hashlib.sha256(content.encode()).hexdigest(),
+            "tokens": count_tokens(content)
+        }
+        self.prompts[key] = entry
+        return entry
+
+    async def load(self):
+        if self.store is None:
+            return
+        for prompt in await self.store.get_all():
+            self.register(prompt["prompt_id"], prompt["content"], prompt["version"], prompt["tenant"])
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self):
+        if self.store is None:
+            return
+        async with self.lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at <= self.refresh_seconds:
+                return
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Failed to refresh stored prompts, using the cached registry: {e}")
+                self.loaded_at = time.monotonic()
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await self.refresh()
+
+    def start(self):
+        # Periodic reloads happen here rather than on the request path
+        if self.store is not None:
+            self.task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def resolve(self, prompt_id, tenant=None):
+        # Tenant-specific prompts shadow the global prompt with the same id.
+        # Ids are compared as strings so 1 and "1" resolve the same prompt.
+        # Only a request arriving before the first load waits for it.
+        if self.loaded_at is None:
+            await self.refresh()
+
+        if prompt_id is None:
+            return None
+        return self.prompts.get((tenant, str(prompt_id))) or self.prompts.get((None, str(prompt_id)))
+
+    async def add(self, prompt_id, content, tenant=None):
+        # Pick up versions written by other containers before numbering this one
+        await self.load()
+        current = self.prompts.get((tenant or None, str(prompt_id)))
+        version = current["version"] + 1 if current else 1
+        if self.store is not None:
+            await self.store.put(str(prompt_id), content, version, tenant)
+        return self.register(prompt_id, content, version, tenant)
+
+    def describe(self):
+        return [
+            {key: value for key, value in entry.items() if key != "content"}
+            for entry in sorted(self.prompts.values(), key=lambda entry: (entry["tenant"] or "", entry["prompt_id"]))
+        ]
@@ -0,0 +1,109 @@
+import os
+import time
+import logging
+from repository.cache import TTLCache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "memory" (per container), "dynamo" (shared across containers) or "none"
+PROSPECT_CACHE_BACKEND = os.environ.get("PROSPECT_CACHE_BACKEND", "memory")
+PROSPECT_CACHE_MAXSIZE = int(os.environ.get("PROSPECT_CACHE_MAXSIZE", "5000"))
+# Entries younger than this are served without asking Bonzo
+PROSPECT_CACHE_TTL = float(os.environ.get("PROSPECT_CACHE_TTL", "300"))
+# Older entries are kept this long so their ETag/Last-Modified can be revalidated
+PROSPECT_CACHE_STALE_TTL = float(os.environ.get("PROSPECT_CACHE_STALE_TTL", "86400"))
+
+# Returned by a conditional fetch when Bonzo answers 304
+NOT_MODIFIED = object()
+
+
+class MemoryCacheBackend:
+    def __init__(self, maxsize=PROSPECT_CACHE_MAXSIZE):
+        self.entries = TTLCache(maxsize=maxsize, ttl=PROSPECT_CACHE_STALE_TTL)
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, entry, ttl):
+        self.entries.set(key, entry, ttl=ttl)
+
+    async def invalidate(self, key):
+        self.entries.invalidate(key)
+
+
+def get_prospect_cache_backend(name=PROSPECT_CACHE_BACKEND):
+    if name == "none":
+        return None
+    if name == "dynamo":
+        from repository.prospect_cache import ProspectCacheStore
+        return ProspectCacheStore()
+    return MemoryCacheBackend()
+
+
+class ProspectCache:
+    def __init__(self, backend, ttl=PROSPECT_CACHE_TTL, stale_ttl=PROSPECT_CACHE_STALE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.backend_errors = 0
+
+    async def _get(self, key):
+        # A broken shared backend degrades to fetching from Bonzo
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Prospect cache read failed for {key}: {e}")
+            return None
+
+    async def _set(self, key, entry):
+        try:
+            await self.backend.set(key, entry, max(self.ttl, self.stale_ttl))
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Prospect cache write failed for {key}: {e}")
+
+    async def fetch(self, key, fetch_fn):
+        # fetch_fn(validators) -> (data, validators) or NOT_MODIFIED
+        entry = await self._get(key)
+        now = time.time()
+        if entry is not None and now - entry["fetched_at"] < self.ttl:
+            self.hits += 1
+            return entry["data"]
+
+        validators = entry["validators"] if entry is not None else None
+        result = await fetch_fn(validators)
+        if result is NOT_MODIFIED and entry is not None:
+            self.revalidated += 1
+            entry = dict(entry, fetched_at=now)
+        else:
+            self.misses += 1
+            data, validators = result
+            entry = {"data": data, "validators": validators, "fetched_at": now}
+
+        await self._set(key, entry)
+        return entry["data"]
+
+    async def invalidate(self, key):
+        try:
+            await self.backend.invalidate(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Prospect cache invalidation failed for {key}: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.revalidated
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "backend_errors": self.backend_errors,
+            "upstream_saved_ratio": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,236 @@
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Client-side budgets per model; the x-ratelimit-* response headers correct
+# them at runtime once the first response arrives.
+OPENAI_RATE_LIMITS = {
+    "gpt-4o": {
+        "requests_per_minute": int(os.environ.get("OPENAI_GPT_4O_RPM", "5000")),
+        "tokens_per_minute": int(os.environ.get("OPENAI_GPT_4O_TPM", "800000"))
+    },
+    "gpt-4.1-mini": {
+        "requests_per_minute": int(os.environ.get("OPENAI_GPT_41_MINI_RPM", "5000")),
+        "tokens_per_minute": int(os.environ.get("OPENAI_GPT_41_MINI_TPM", "4000000"))
+    }
+}
+OPENAI_DEFAULT_RATE_LIMIT = {"requests_per_minute": 500, "tokens_per_minute": 200000}
+
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "5"))
+OPENAI_BACKOFF_BASE = float(os.environ.get("OPENAI_BACKOFF_BASE", "0.5"))
+OPENAI_BACKOFF_MAX = float(os.environ.get("OPENAI_BACKOFF_MAX", "30"))
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    # OpenAI reset headers look like "1s", "6m0s" or "120ms"
+    if not value:
+        return None
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+def estimate_tokens(messages):
+    # Rough pre-flight estimate (~4 characters per token); reconciled with
+    # the real usage once the response arrives.
+    return sum(len(str(message.get("content", ""))) for message in messages) // 4 + 4 * len(messages)
+
+
+class TokenBucket:
+    def __init__(self, capacity, per_minute):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        self.refill()
+        self.level -= min(amount, self.capacity)
+
+    def credit(self, amount):
+        self.refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def reset(self, limit=None, remaining=None):
+        self.refill()
+        if limit:
+            self.capacity = limit
+            self.rate = limit / 60.0
+        if remaining is not None:
+            self.level = min(self.capacity, remaining)
+
+
+class ModelRateLimiter:
+    def __init__(self, model, requests_per_minute, tokens_per_minute):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute)
+        self.lock = asyncio.Lock()
+        self.paused_until = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+
+    async def acquire(self, estimated_tokens):
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        start = time.monotonic()
+        try:
+            # The lock keeps waiters in FIFO order
+            async with self.lock:
+                while True:
+                    delay = max(
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens),
+                        self.paused_until - time.monotonic()
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.requests.consume(1)
+                self.tokens.consume(estimated_tokens)
+        finally:
+            self.queue_depth -= 1
+            waited = time.monotonic() - start
+            self.acquired += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        if actual_tokens is None:
+            return
+        if actual_tokens < estimated_tokens:
+            self.tokens.credit(estimated_tokens - actual_tokens)
+        else:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+    def observe_headers(self, headers):
+        if not headers:
+            return
+
+        def header_int(name):
+            try:
+                return int(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        self.requests.reset(header_int("x-ratelimit-limit-requests"), header_int("x-ratelimit-remaining-requests"))
+        self.tokens.reset(header_int("x-ratelimit-limit-tokens"), header_int("x-ratelimit-remaining-tokens"))
+
+    def backoff_delay(self, attempt, headers=None):
+        retry_after = None
+        if headers:
+            retry_after = parse_duration(headers.get("retry-after-ms"))
+            retry_after = retry_after / 1000 if retry_after is not None else None
+            retry_after = retry_after or parse_duration(headers.get("retry-after"))
+            retry_after = retry_after or max(
+                parse_duration(headers.get("x-ratelimit-reset-requests")) or 0,
+                parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0
+            ) or None
+
+        # Full jitter on an exponential ceiling, never sooner than the server asked
+        delay = random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def stats(self):
+        self.requests.refill()
+        self.tokens.refill()
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "wait_seconds_total": self.wait_seconds,
+            "wait_seconds_avg": self.wait_seconds / self.acquired if self.acquired else 0.0,
+            "wait_seconds_max": self.max_wait_seconds,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "requests_available": int(self.requests.level),
+            "requests_per_minute": self.requests.capacity,
+            "tokens_available": int(self.tokens.level),
+            "tokens_per_minute": self.tokens.capacity
+        }
+
+
+class RateLimiter:
+    def __init__(self, limits=None, max_retries=OPENAI_MAX_RETRIES):
+        self.limits = OPENAI_RATE_LIMITS if limits is None else limits
+        self.max_retries = max_retries
+        self.models = {}
+
+    def for_model(self, model):
+        if model not in self.models:
+            limit = self.limits.get(model, OPENAI_DEFAULT_RATE_LIMIT)
+            self.models[model] = ModelRateLimiter(model, limit["requests_per_minute"], limit["tokens_per_minute"])
+        return self.models[model]
+
+    async def call(self, model, request_fn, estimated_tokens):
+        # request_fn performs one attempt. Raw responses (with_raw_response)
+        # have their rate-limit headers read and are parsed before returning.
+        limiter = self.for_model(model)
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire(estimated_tokens)
+            try:
+                result = await request_fn()
+            except RETRYABLE_ERRORS as e:
+                response = getattr(e, "response", None)
+                headers = response.headers if response is not None else None
+                if isinstance(e, RateLimitError):
+                    limiter.rate_limited += 1
+                    limiter.observe_headers(headers)
+                if attempt == self.max_retries:
+                    raise
+
+                delay = limiter.backoff_delay(attempt, headers)
+                if isinstance(e, RateLimitError):
+                    limiter.paused_until = max(limiter.paused_until, time.monotonic() + delay)
+                limiter.retries += 1
+                logger.warning(f"{type(e).__name__} from {model}, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+                continue
+
+            limiter.observe_headers(getattr(result, "headers", None))
+            if hasattr(result, "parse") and hasattr(result, "headers"):
+                result = result.parse()
+
+            usage = getattr(result, "usage", None)
+            if usage is not None:
+                limiter.reconcile(estimated_tokens, usage.total_tokens)
+            return result
+
+    def stats(self):
+        return {model: limiter.stats() for model, limiter in self.models.items()}
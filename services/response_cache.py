@@ -0,0 +1,121 @@
+import os
+import re
+import copy
+import logging
+import numpy as np
+from repository.cache import TTLCache
+from services.summary import history_fingerprint
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Off unless enabled here or per request with "cache": true
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAXSIZE = int(os.environ.get("RESPONSE_CACHE_MAXSIZE", "5000"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+# Minimum cosine similarity for a near-identical question to count as a hit
+RESPONSE_CACHE_SIMILARITY = float(os.environ.get("RESPONSE_CACHE_SIMILARITY", "0.92"))
+# Turns before the newest message folded into the key; 0 ignores history
+RESPONSE_CACHE_HISTORY_TURNS = int(os.environ.get("RESPONSE_CACHE_HISTORY_TURNS", "0"))
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(text):
+    return WHITESPACE.sub(" ", PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+class ResponseCache:
+    def __init__(self, embedder, maxsize=RESPONSE_CACHE_MAXSIZE, ttl=RESPONSE_CACHE_TTL,
+                 similarity=RESPONSE_CACHE_SIMILARITY, history_turns=RESPONSE_CACHE_HISTORY_TURNS):
+        self.embedder = embedder
+        self.similarity = similarity
+        self.history_turns = history_turns
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # partition -> {normalized message: vector} for similarity lookups; bounded
+        # like the entries, so partitions of finished conversations age out
+        self.partitions = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def partition(self, context_id, goal, tone, scope, message_history):
+        # scope decides whether prospect fields are extracted into the reply
+        history = ""
+        if self.history_turns:
+            history = history_fingerprint(message_history[-self.history_turns - 1:-1])
+        return (context_id, goal or "", tone or "", scope or "", history)
+
+    async def get(self, context_id, goal, tone, scope, message_history, newest_message):
+        partition = self.partition(context_id, goal, tone, scope, message_history)
+        normalized = normalize_message(newest_message)
+
+        cached = self.entries.get(partition + (normalized,))
+        if cached is not None:
+            self.exact_hits += 1
+            return copy.deepcopy(cached)
+
+        vectors = self.partitions.get(partition)
+        if vectors:
+            # Drop vectors whose entries have expired or been evicted
+            for key in [key for key in vectors if (partition + (key,)) not in self.entries]:
+                del vectors[key]
+
+        if vectors:
+            keys = list(vectors)
+            query = (await self.embedder.embed([normalized]))[0]
+            scores = np.stack([vectors[key] for key in keys]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity:
+                cached = self.entries.get(partition + (keys[best],))
+                if cached is not None:
+                    self.semantic_hits += 1
+                    logger.info(f"Semantic cache hit for context {context_id} (similarity {scores[best]:.3f})")
+                    cached = copy.deepcopy(cached)
+                    # Extracted fields belong to the original wording, not this message
+                    cached["changes"] = {"prospect_schema_data": {}}
+                    return cached
+
+        self.misses += 1
+        return None
+
+    async def set(self, context_id, goal, tone, scope, message_history, newest_message, response):
+        partition = self.partition(context_id, goal, tone, scope, message_history)
+        normalized = normalize_message(newest_message)
+        vector = (await self.embedder.embed([normalized]))[0]
+
+        self.entries.set(partition + (normalized,), copy.deepcopy(response))
+        vectors = self.partitions.get(partition)
+        if vectors is None:
+            vectors = {}
+        vectors[normalized] = vector
+        # Re-set so the partition lives as long as its newest entry
+        self.partitions.set(partition, vectors)
+        self.stores += 1
+
+    def invalidate_context(self, context_id):
+        for partition in [partition for partition in self.partitions.keys() if partition[0] == context_id]:
+            for normalized in self.partitions.get(partition) or ():
+                self.entries.invalidate(partition + (normalized,))
+            self.partitions.invalidate(partition)
+        self.invalidations += 1
+
+    def stats(self):
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "enabled_by_default": RESPONSE_CACHE_ENABLED,
+            "size": len(self.entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.entries.evictions,
+            "expirations": self.entries.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,70 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from repository.cache import TTLCache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Finished results are replayed to duplicates arriving within this many seconds; 0 disables
+DEDUP_WINDOW = float(os.environ.get("DEDUP_WINDOW", "30"))
+DEDUP_MAXSIZE = int(os.environ.get("DEDUP_MAXSIZE", "10000"))
+
+_MISSING = object()
+
+
+def request_fingerprint(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self, window=DEDUP_WINDOW, maxsize=DEDUP_MAXSIZE):
+        self.inflight = {}
+        self.recent = TTLCache(maxsize=maxsize, ttl=window) if window > 0 else None
+        self.leaders = 0
+        self.coalesced = 0
+        self.replayed = 0
+
+    async def do(self, key, fn, remember=None):
+        # remember(result) decides whether a result is replayed within the window
+        if self.recent is not None:
+            result = self.recent.get(key, _MISSING)
+            if result is not _MISSING:
+                self.replayed += 1
+                logging.info(f"Replaying result for duplicate request {key[:16]}")
+                return result
+
+        task = self.inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._run(key, fn, remember))
+            # Nobody may be left to await a failed task once callers disconnect
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.inflight[key] = task
+        else:
+            self.coalesced += 1
+            logging.info(f"Coalescing duplicate in-flight request {key[:16]}")
+
+        # Shielded so one caller disconnecting doesn't cancel the shared work
+        return await asyncio.shield(task)
+
+    async def _run(self, key, fn, remember):
+        try:
+            result = await fn()
+            if self.recent is not None and (remember is None or remember(result)):
+                self.recent.set(key, result)
+            return result
+        finally:
+            self.inflight.pop(key, None)
+
+    def stats(self):
+        return {
+            "in_flight": len(self.inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+            "window_entries": len(self.recent) if self.recent is not None else 0
+        }
@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import logging
+from services.tokens import count_message_tokens
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Turns kept verbatim at the end of the prompt; 0 disables windowing
+SUMMARY_WINDOW_TURNS = int(os.environ.get("SUMMARY_WINDOW_TURNS", "10"))
+# Older turns are folded into the summary once this many have piled up
+SUMMARY_BATCH_TURNS = int(os.environ.get("SUMMARY_BATCH_TURNS", "6"))
+
+
+def message_text(message):
+    # /message-teli-data uses "message", Bonzo history uses "content"
+    return message.get("content") or message.get("message") or ""
+
+def history_fingerprint(messages):
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(json.dumps([message.get("role"), message_text(message)]).encode())
+    return digest.hexdigest()
+
+
+class ConversationSummarizer:
+    def __init__(self, store, summarize_fn, window_turns=SUMMARY_WINDOW_TURNS, batch_turns=SUMMARY_BATCH_TURNS):
+        # summarize_fn(previous_summary, messages) -> new summary text
+        self.store = store
+        self.summarize_fn = summarize_fn
+        self.window_turns = window_turns
+        self.batch_turns = batch_turns
+        self.refreshing = set()
+        self.windowed = 0
+        self.refreshes = 0
+        self.prompt_tokens_before = 0
+        self.prompt_tokens_after = 0
+
+    async def covered(self, key, older):
+        # How many of the older turns the stored summary covers. A summary of
+        # a different history (edited or another conversation) is discarded.
+        state = await self.store.get_summary(key)
+        if state and state["count"] <= len(older) and state["fingerprint"] == history_fingerprint(older[:state["count"]]):
+            return state["count"], state["summary"]
+        return 0, None
+
+    async def window(self, key, messages):
+        # Returns (summary, messages to send verbatim, whether the stored
+        # summary is behind and should be refreshed).
+        if not self.window_turns or len(messages) <= self.window_turns:
+            return None, messages, False
+
+        older = messages[:-self.window_turns]
+        covered, summary = await self.covered(key, older)
+
+        # Anything older than the window that the summary doesn't cover yet
+        # stays verbatim until the next refresh lands.
+        recent = messages[covered:]
+        stale = len(older) - covered >= self.batch_turns
+
+        before = count_message_tokens(messages)
+        after = count_message_tokens(recent) + count_message_tokens([{"content": summary}] if summary else [])
+        self.windowed += 1
+        self.prompt_tokens_before += before
+        self.prompt_tokens_after += after
+        logger.info(f"Conversation {key}: {len(messages)} turns, {covered} summarised, history tokens {before} -> {after}")
+
+        return summary, recent, stale
+
+    async def refresh(self, key, messages):
+        # Fold the turns that fell out of the window into the stored summary,
+        # summarising only what the previous summary doesn't already cover.
+        if key in self.refreshing:
+            return
+        self.refreshing.add(key)
+        try:
+            older = messages[:-self.window_turns]
+            covered, summary = await self.covered(key, older)
+            if covered >= len(older):
+                return
+
+            summary = await self.summarize_fn(summary, older[covered:])
+            await self.store.save_summary(key, {
+                "summary": summary,
+                "count": len(older),
+                "fingerprint": history_fingerprint(older)
+            })
+            self.refreshes += 1
+            logger.info(f"Conversation {key}: summary now covers {len(older)} turns")
+        except Exception as e:
+            logger.error(f"Failed to refresh conversation summary for {key}: {e}")
+        finally:
+            self.refreshing.discard(key)
+
+    def stats(self):
+        return {
+            "window_turns": self.window_turns,
+            "windowed": self.windowed,
+            "refreshes": self.refreshes,
+            "prompt_tokens_before": self.prompt_tokens_before,
+            "prompt_tokens_after": self.prompt_tokens_after,
+            "reduction": 1 - self.prompt_tokens_after / self.prompt_tokens_before if self.prompt_tokens_before else 0.0
+        }
@@ -0,0 +1,33 @@
+import os
+import logging
+from functools import lru_cache
+import tiktoken
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# gpt-4o and gpt-4.1-mini both use o200k_base
+TOKEN_ENCODING = os.environ.get("TOKEN_ENCODING", "o200k_base")
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        # tiktoken downloads the BPE file on first use; without it fall back
+        # to the ~4 characters per token estimate
+        logger.warning(f"Could not load tiktoken encoding {TOKEN_ENCODING}, estimating token counts: {e}")
+        return None
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(messages):
+    # Chat format overhead: ~4 tokens per message plus 3 for the reply primer
+    return sum(count_tokens(str(message.get("content") or message.get("message") or "")) + 4 for message in messages) + 3
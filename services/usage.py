@@ -0,0 +1,186 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows are aggregated per time bucket in memory and flushed in batches
+USAGE_BUCKET_SECONDS = int(os.environ.get("USAGE_BUCKET_SECONDS", "60"))
+USAGE_FLUSH_SECONDS = float(os.environ.get("USAGE_FLUSH_SECONDS", "60"))
+USAGE_MAX_PENDING = int(os.environ.get("USAGE_MAX_PENDING", "5000"))
+
+# USD per million tokens: (input, cached input, output)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+}
+
+DIMENSIONS = ("model", "endpoint", "context_id", "prompt_id", "on_behalf_of")
+COUNTERS = ("calls", "requests", "prompt_tokens", "cached_tokens", "completion_tokens", "cost_micros", "latency_ms")
+
+# Request rows carry latency only; LLM rows carry tokens and cost
+REQUEST_MODEL = "-"
+
+_scope = contextvars.ContextVar("usage_scope", default=None)
+
+
+def cost_micros(model, prompt_tokens, cached_tokens, completion_tokens):
+    # Integer micro-dollars, since DynamoDB numbers can't be floats
+    input_price, cached_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+    return round((prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price + completion_tokens * output_price)
+
+def bucket_start(timestamp, seconds):
+    return int(timestamp // seconds * seconds)
+
+
+class UsageLedger:
+    def __init__(self, store, bucket_seconds=USAGE_BUCKET_SECONDS, flush_seconds=USAGE_FLUSH_SECONDS, max_pending=USAGE_MAX_PENDING):
+        self.store = store
+        self.bucket_seconds = bucket_seconds
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.instance = uuid.uuid4().hex[:12]
+        self.pending = {}
+        self.flushes = 0
+        self.task = None
+        self.recorded = 0
+        self.flushed_rows = 0
+        self.flush_failures = 0
+
+    def begin(self, endpoint):
+        _scope.set({"endpoint": endpoint or "unknown"})
+
+    def tag(self, **fields):
+        # Attribution for everything recorded later in this request
+        scope = _scope.get()
+        if scope is None:
+            scope = {"endpoint": "background"}
+            _scope.set(scope)
+        scope.update({name: str(value) for name, value in fields.items() if value is not None})
+
+    def _row(self, model):
+        scope = _scope.get() or {"endpoint": "background"}
+        key = (bucket_start(time.time(), self.bucket_seconds), model, *(scope.get(name, "") for name in DIMENSIONS[1:]))
+        row = self.pending.get(key)
+        if row is None:
+            row = self.pending[key] = dict.fromkeys(COUNTERS, 0)
+        return row
+
+    def record(self, model, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+
+        row = self._row(model)
+        row["calls"] += 1
+        row["prompt_tokens"] += usage.prompt_tokens
+        row["cached_tokens"] += cached_tokens
+        row["completion_tokens"] += completion_tokens
+        row["cost_micros"] += cost_micros(model, usage.prompt_tokens, cached_tokens, completion_tokens)
+        self.recorded += 1
+        self._maybe_flush()
+
+    def record_request(self, elapsed):
+        scope = _scope.get()
+        # Only endpoints that tagged an owner are worth accounting
+        if scope is None or len(scope) < 2:
+            return
+        row = self._row(REQUEST_MODEL)
+        row["requests"] += 1
+        row["latency_ms"] += round(elapsed * 1000)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self.pending) >= self.max_pending:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    def _items(self, rows):
+        items = []
+        for n, (key, counters) in enumerate(rows.items()):
+            bucket, *dimensions = key
+            items.append({
+                "id": f"{bucket}#{self.instance}#{self.flushes}#{n}",
+                "bucket": bucket,
+                **dict(zip(DIMENSIONS, dimensions)),
+                **counters
+            })
+        return items
+
+    async def flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, {}
+        self.flushes += 1
+        try:
+            await self.store.write(self._items(rows))
+            self.flushed_rows += len(rows)
+        except Exception as e:
+            # Keep the rows for the next flush rather than losing spend data
+            self.flush_failures += 1
+            logging.error(f"Usage ledger flush failed, retrying next interval: {e}")
+            for key, counters in rows.items():
+                row = self.pending.setdefault(key, dict.fromkeys(COUNTERS, 0))
+                for name, value in counters.items():
+                    row[name] += value
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self):
+        self.task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+
+    async def query(self, start, end, group_by=("on_behalf_of", "prompt_id"), window=None):
+        items = await self.store.scan(bucket_start(start, self.bucket_seconds), end)
+        # Rows not flushed yet are part of the answer too
+        items.extend(self._items(self.pending))
+
+        groups = {}
+        for item in items:
+            bucket = int(item["bucket"])
+            if not bucket_start(start, self.bucket_seconds) <= bucket <= end:
+                continue
+            window_start = bucket_start(bucket, window) if window else None
+            key = (window_start, *(item.get(name, "") for name in group_by))
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = dict.fromkeys(COUNTERS, 0)
+            for name in COUNTERS:
+                group[name] += int(item.get(name, 0))
+
+        results = []
+        for (window_start, *values), counters in groups.items():
+            result = dict(zip(group_by, values))
+            if window:
+                result["window_start"] = window_start
+            result.update({name: value for name, value in counters.items() if name not in ("cost_micros", "latency_ms")})
+            result["cost_usd"] = counters["cost_micros"] / 1e6
+            result["avg_latency_ms"] = counters["latency_ms"] / counters["requests"] if counters["requests"] else None
+            results.append(result)
+
+        results.sort(key=lambda result: (result.get("window_start") or 0, -result["cost_usd"]))
+        return results
+
+    def stats(self):
+        return {
+            "pending_rows": len(self.pending),
+            "recorded": self.recorded,
+            "flushed_rows": self.flushed_rows,
+            "flush_failures": self.flush_failures
+        }
@@ -0,0 +1,99 @@
+import os
+import asyncio
+import logging
+import aiohttp
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bounded in-process pool for async send_ai_message jobs
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+JOB_QUEUE_MAXSIZE = int(os.environ.get("JOB_QUEUE_MAXSIZE", "1000"))
+JOB_SHUTDOWN_TIMEOUT = float(os.environ.get("JOB_SHUTDOWN_TIMEOUT", "20"))
+
+# Result delivery to caller-supplied callback URLs
+CALLBACK_TIMEOUT = float(os.environ.get("CALLBACK_TIMEOUT", "10"))
+CALLBACK_RETRIES = int(os.environ.get("CALLBACK_RETRIES", "3"))
+
+
+class WorkerPool:
+    def __init__(self, workers=JOB_WORKERS, maxsize=JOB_QUEUE_MAXSIZE):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.tasks = []
+        self.session = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy = 0
+
+    def start(self):
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=CALLBACK_TIMEOUT))
+        self.tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logging.info(f"Started {self.workers} job workers.")
+
+    async def stop(self, timeout=JOB_SHUTDOWN_TIMEOUT):
+        # Let queued jobs finish before the container goes away
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Job queue not drained after {timeout}s; {self.queue.qsize()} jobs dropped.")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.session:
+            await self.session.close()
+
+    def submit(self, fn, *args):
+        try:
+            self.queue.put_nowait((fn, args))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.submitted += 1
+        return True
+
+    async def _worker(self, n):
+        while True:
+            fn, args = await self.queue.get()
+            self.busy += 1
+            try:
+                await fn(*args)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Job worker {n} failed: {e}")
+            finally:
+                self.busy -= 1
+                self.queue.task_done()
+
+    async def post_callback(self, url, payload):
+        for attempt in range(CALLBACK_RETRIES):
+            try:
+                async with self.session.post(url, json=payload) as response:
+                    if response.status < 500:
+                        if response.status >= 400:
+                            logging.warning(f"Callback to {url} rejected with status {response.status}")
+                        return response.status
+                    logging.warning(f"Callback to {url} failed with status {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Callback to {url} failed: {e}")
+            if attempt + 1 < CALLBACK_RETRIES:
+                await asyncio.sleep(2 ** attempt)
+        logging.error(f"Giving up on callback to {url} after {CALLBACK_RETRIES} attempts")
+        return None
+
+    def stats(self):
+        return {
+            "workers": len(self.tasks),
+            "busy": self.busy,
+            "queued": self.queue.qsize(),
+            "queue_maxsize": self.queue.maxsize,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,119 @@
+"""Error semantics of the concurrent Bonzo fetches, against the local stub."""
+import asyncio
+import logging
+
+import pytest
+
+from benchmarks.fakes import FakeBonzoAPI
+from benchmarks.harness import API_KEY, load_app
+from services import bonzo
+from services.bonzo import BonzoAPIError
+
+HEADERS = bonzo.bonzo_headers("token", "owner@example.com")
+
+
+def fetch_context(api, prospect_id="p1"):
+    async def run():
+        bonzo.BONZO_API_BASE = await api.start()
+        try:
+            async with bonzo.create_session() as session:
+                return await bonzo.fetch_prospect_context(session, prospect_id, HEADERS)
+        finally:
+            await api.stop()
+    return asyncio.run(run())
+
+
+def test_fetches_history_prospect_and_notes():
+    message_history, prospect_data, notes_content = fetch_context(FakeBonzoAPI(messages=4, notes=2))
+
+    assert [message["role"] for message in message_history] == ["user", "assistant", "user", "assistant"]
+    assert message_history[0]["content"] == "message 0 from prospect p1"
+    assert prospect_data["id"] == "p1"
+    assert notes_content == ["note 0 v0", "note 1 v0"]
+
+
+def test_fetches_run_concurrently():
+    api = FakeBonzoAPI(latency=0.2)
+
+    async def run():
+        bonzo.BONZO_API_BASE = await api.start()
+        try:
+            async with bonzo.create_session() as session:
+                await bonzo.fetch_prospect_context(session, "warmup", HEADERS)
+                start = asyncio.get_running_loop().time()
+                await bonzo.fetch_prospect_context(session, "p1", HEADERS)
+                return asyncio.get_running_loop().time() - start
+        finally:
+            await api.stop()
+
+    # Three sequential round trips would take at least 0.6s
+    assert asyncio.run(run()) < 0.5
+
+
+def test_empty_history_is_404():
+    with pytest.raises(BonzoAPIError) as error:
+        fetch_context(FakeBonzoAPI(messages=0))
+    assert error.value.status == 404
+    assert error.value.message == "No communication history found"
+
+
+def test_contentless_history_is_404():
+    with pytest.raises(BonzoAPIError) as error:
+        fetch_context(FakeBonzoAPI(messages=3, content=False))
+    assert error.value.status == 404
+    assert error.value.message == "No valid messages found in communication history"
+
+
+def test_notes_are_optional():
+    message_history, prospect_data, notes_content = fetch_context(FakeBonzoAPI(messages=2, notes_status=503))
+
+    assert len(message_history) == 2
+    assert prospect_data["id"] == "p1"
+    assert notes_content == []
+
+
+def test_slow_notes_degrade_to_empty(monkeypatch):
+    monkeypatch.setattr(bonzo, "BONZO_FETCH_TIMEOUT", 0.1)
+    _, _, notes_content = fetch_context(FakeBonzoAPI(messages=2, route_latency={"notes": 1.0}))
+    assert notes_content == []
+
+
+def test_slow_history_times_out(monkeypatch):
+    monkeypatch.setattr(bonzo, "BONZO_FETCH_TIMEOUT", 0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        fetch_context(FakeBonzoAPI(messages=2, route_latency={"communication": 1.0}))
+
+
+def test_send_ai_message_maps_timeout_to_504(monkeypatch):
+    # The model is never reached, so OpenAI can point anywhere
+    app = load_app("http://127.0.0.1:9")
+    api = FakeBonzoAPI(messages=2, route_latency={"prospect": 1.0})
+    monkeypatch.setattr(bonzo, "BONZO_FETCH_TIMEOUT", 0.1)
+    logging.disable(logging.ERROR)
+
+    async def run():
+        bonzo.BONZO_API_BASE = await api.start()
+        try:
+            async with app.quart_app.test_app() as test_app:
+                response = await test_app.test_client().post(
+                    "/send_ai_message",
+                    json={"prospect_id": "p1", "prompt_id": 1, "on_behalf_of": "owner@example.com", "auth_token": "token"},
+                    headers={"X-API-Key": API_KEY}
+                )
+                return response.status_code, await response.get_json()
+        finally:
+            await api.stop()
+            logging.disable(logging.NOTSET)
+
+    status, body = asyncio.run(run())
+    assert status == 504
+    assert body == {"error": "Timed out calling the Bonzo API"}
+    assert api.sent == []
+
+
+def test_history_without_sync_is_one_plain_get():
+    # Paging parameters are only sent by HistorySync
+    api = FakeBonzoAPI(messages=250)
+    message_history, _, _ = fetch_context(api)
+    assert len(message_history) == 250
+    assert api.hits["communication"] == 1
@@ -0,0 +1,97 @@
+"""Prospect/notes cache against the local Bonzo stub: hits, 304 revalidation, changes."""
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeBonzoAPI, FakeDynamoTable
+from repository.prospect_cache import ProspectCacheStore
+from services import bonzo
+from services.prospect_cache import MemoryCacheBackend, ProspectCache
+
+HEADERS = bonzo.bonzo_headers("token", "owner@example.com")
+
+
+def fetch_rounds(api, cache, rounds, change_before=None):
+    # fetch_prospect_context for p1 `rounds` times; returns the results
+    async def run():
+        bonzo.BONZO_API_BASE = await api.start()
+        results = []
+        try:
+            async with bonzo.create_session() as session:
+                for n in range(rounds):
+                    if n == change_before:
+                        api.version += 1
+                    results.append(await bonzo.fetch_prospect_context(session, "p1", HEADERS, cache))
+        finally:
+            await api.stop()
+        return results
+    return asyncio.run(run())
+
+
+@pytest.fixture(params=["memory", "dynamo"])
+def backend(request):
+    if request.param == "memory":
+        yield MemoryCacheBackend()
+        return
+    store = ProspectCacheStore(table=FakeDynamoTable())
+    yield store
+    store.close()
+
+
+def test_fresh_entries_are_served_from_cache(backend):
+    api = FakeBonzoAPI(messages=2)
+    cache = ProspectCache(backend)
+
+    results = fetch_rounds(api, cache, 3)
+
+    assert api.hits["prospect"] == 1
+    assert api.hits["notes"] == 1
+    assert "prospect_304" not in api.hits
+    assert results[0][1:] == results[2][1:]
+    assert cache.stats()["hits"] == 4
+    assert cache.stats()["misses"] == 2
+
+
+def test_stale_entries_revalidate_with_304(backend):
+    api = FakeBonzoAPI(messages=2)
+    cache = ProspectCache(backend, ttl=0)
+
+    results = fetch_rounds(api, cache, 3)
+
+    assert api.hits["prospect"] == 1
+    assert api.hits["prospect_304"] == 2
+    assert api.hits["notes"] == 1
+    assert api.hits["notes_304"] == 2
+    assert results[2][1:] == results[0][1:]
+    assert cache.stats()["revalidated"] == 4
+
+
+def test_changed_data_is_refetched(backend):
+    api = FakeBonzoAPI(messages=2)
+    cache = ProspectCache(backend, ttl=0)
+
+    results = fetch_rounds(api, cache, 3, change_before=2)
+
+    assert api.hits["prospect"] == 2
+    assert api.hits["prospect_304"] == 1
+    assert results[1][1]["version"] == 0
+    assert results[2][1]["version"] == 1
+    assert results[2][2] == ["note 0 v1", "note 1 v1", "note 2 v1"]
+
+
+def test_history_is_never_cached():
+    api = FakeBonzoAPI(messages=2)
+    fetch_rounds(api, ProspectCache(MemoryCacheBackend()), 3)
+    assert api.hits["communication"] == 3
+
+
+def test_failed_notes_are_not_cached():
+    api = FakeBonzoAPI(messages=2, notes_status=503)
+    cache = ProspectCache(MemoryCacheBackend())
+
+    first = fetch_rounds(api, cache, 1)
+    api.notes_status = 200
+    second = fetch_rounds(api, cache, 1)
+
+    assert first[0][2] == []
+    assert second[0][2] == ["note 0 v0", "note 1 v0", "note 2 v0"]